@@ -1,12 +1,15 @@
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
+import uuid
+import bcrypt
 import jwt
 from app import config, users
+from app.token_cache import verified_tokens
+from app.token_revocation import revoked_tokens
 
-# Initialize Passlib's context for bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt only uses the first 72 bytes of a password
+BCRYPT_MAX_PASSWORD_BYTES = 72
 
 # Configuration for JWT
 JWT_SECRET_KEY = config.load_jwt_secret_key()
@@ -14,12 +17,55 @@ ALGORITHM = config.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRATION_MINUTES = config.ACCESS_TOKEN_EXPIRATION_MINUTES
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# For endpoints that also accept requests without an access token
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/auth/login", auto_error=False
+)
+
+
+class Principal(str):
+    """
+    The authenticated user. It's the username, so it can be used wherever
+    a username is, along with the user's resolved permissions.
+    """
+    __slots__ = ("permissions", "permissions_version")
+
+    def __new__(
+        cls, username: str, permissions: users.Permissions, version: str
+    ):
+        principal = super().__new__(cls, username)
+        principal.permissions = permissions
+        principal.permissions_version = version
+        return principal
+
+    @property
+    def username(self) -> str:
+        return str(self)
+
+    def __reduce__(self):
+        # Copies and pickles are plain usernames
+        return str, (str(self),)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    """
+    Hash a password with bcrypt, using the configured work factor.
+    This takes a while by design: use password_executor.run_hash_password
+    from async code.
+    """
+    return bcrypt.hashpw(
+        password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+        bcrypt.gensalt(rounds=config.BCRYPT_ROUNDS)
+    ).decode()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    """
+    Check a password against its bcrypt hash (the hash holds its own work
+    factor). Use password_executor.run_verify_password from async code.
+    """
+    return bcrypt.checkpw(
+        plain_password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+        hashed_password.encode()
+    )
 
 # def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 #     to_encode = data.copy()
@@ -35,28 +81,161 @@ def generate_access_token(username: str):
     expiration_delta = timedelta(
         minutes=config.ACCESS_TOKEN_EXPIRATION_MINUTES)
     expires_at_utc = datetime.now(timezone.utc) + expiration_delta
-    data = {"username": username, "exp": expires_at_utc}
+    data = {
+        "username": username,
+        "type": "access",
+        "jti": uuid.uuid4().hex,
+        "exp": expires_at_utc
+    }
+    if config.TOKEN_PERMISSIONS_CLAIM:
+        index = users.get_permission_index()
+        data["perms"] = index.permissions.get(
+            username, users.Permissions()
+        ).to_claim(index.version(username))
+    token = jwt.encode(data, JWT_SECRET_KEY, algorithm=ALGORITHM)
+
+    return {"token": token, "expires_at_utc": expires_at_utc}
+
+def generate_refresh_token(username: str, family: str = None):
+    """
+    Generate a single-use refresh token. Every token that's refreshed from
+    the same login shares its family, so a stolen token that's used twice
+    can revoke all of them.
+    """
+    expiration_delta = timedelta(
+        minutes=config.REFRESH_TOKEN_EXPIRATION_MINUTES)
+    expires_at_utc = datetime.now(timezone.utc) + expiration_delta
+    data = {
+        "username": username,
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "family": family or uuid.uuid4().hex,
+        "exp": expires_at_utc
+    }
     token = jwt.encode(data, JWT_SECRET_KEY, algorithm=ALGORITHM)
 
     return {"token": token, "expires_at_utc": expires_at_utc}
 
-def get_username_from_token(token: str = Depends(oauth2_scheme)) -> str:
+def decode_refresh_token(token: str) -> dict:
+    """
+    Check a refresh token's signature and expiry (no password hashing
+    involved), and return its claims
+    """
+    try:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.exceptions.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has expired"
+        )
+    except jwt.exceptions.PyJWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    if payload.get("type") != "refresh" or not all(
+        payload.get(claim) for claim in ("username", "jti", "family")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    if revoked_tokens.is_revoked(payload["family"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked"
+        )
+    return payload
+
+def revoke_refresh_token_family(payload: dict):
+    """Revoke every refresh token refreshed from the same login"""
+    # Any token of the family that's still valid expires by then
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        minutes=config.REFRESH_TOKEN_EXPIRATION_MINUTES
+    )
+    revoked_tokens.revoke(payload["family"], expires_at.timestamp())
+
+def get_principal(username: str, claim: dict = None) -> Principal:
+    """
+    The user's principal, with the permissions of the token's claim when
+    they're still the user's current permissions. Otherwise, the current
+    permissions are looked up, or the token is rejected, depending on
+    STALE_TOKEN_PERMISSIONS.
+    """
+    index = users.get_permission_index()
+    version = index.version(username)
+    if claim and claim.get("v") == version:
+        permissions = users.Permissions.from_claim(claim)
+    elif claim and config.STALE_TOKEN_PERMISSIONS == "reject":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Permissions have changed since the token was issued. "
+            "Please refresh the token."
+        )
+    else:
+        permissions = index.permissions.get(username, users.Permissions())
+    return Principal(username, permissions, version)
+
+def check_not_revoked(payload: dict):
+    if revoked_tokens.is_revoked(payload.get("jti")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+def authenticate_token(token: str) -> tuple[dict, Principal]:
+    """
+    Verify an access token, and return its claims and the user's
+    principal. Tokens that were already verified are found in the verified
+    token cache, without decoding them again. Revocation is checked either
+    way.
+    """
+    cache_key = verified_tokens.key(token)
+    cached = verified_tokens.get(cache_key)
+    if cached:
+        payload, principal = cached
+        check_not_revoked(payload)
+        if principal.permissions_version == users.get_permissions_version(
+            principal
+        ):
+            return payload, principal
+        # The permissions changed since the principal was cached
+        try:
+            principal = get_principal(payload["username"], payload.get("perms"))
+        except HTTPException:
+            verified_tokens.discard(cache_key)
+            raise
+        verified_tokens.put(cache_key, payload, principal)
+        return payload, principal
+
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("username")
-        if username is None:
+        # Refresh tokens can't be used as access tokens
+        if username is None or payload.get("type", "access") != "access":
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials"
             )
-        return username
+        check_not_revoked(payload)
+        principal = get_principal(username, payload.get("perms"))
+        verified_tokens.put(cache_key, payload, principal)
+        return payload, principal
+    # ExpiredSignatureError is a PyJWTError, so it has to be caught first
+    except jwt.exceptions.ExpiredSignatureError:
+        raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has expired"
+        )
     except jwt.exceptions.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
-    except jwt.exceptions.ExpiredSignatureError:
-        raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired"
-        )
\ No newline at end of file
+
+def get_username_from_token(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Authenticate the request's token, and return the user's principal
+    (which is also the username)
+    """
+    return authenticate_token(token)[1]
@@ -0,0 +1,99 @@
+import threading
+import boto3
+from botocore.config import Config
+from app import config
+
+AWS_PROFILE = "resoursphere"
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=config.AWS_CLIENT_MAX_POOL_CONNECTIONS,
+    retries={
+        "mode": config.AWS_CLIENT_RETRY_MODE,
+        "total_max_attempts": config.AWS_CLIENT_MAX_ATTEMPTS
+    },
+    connect_timeout=config.AWS_CLIENT_CONNECT_TIMEOUT,
+    read_timeout=config.AWS_CLIENT_READ_TIMEOUT
+)
+
+_session = boto3.Session(
+    profile_name=AWS_PROFILE, region_name=config.AWS_DEFAULT_REGION
+)
+_clients = {}
+# boto3 sessions aren't thread-safe, so clients are built under a lock.
+# The clients themselves are safe to share between threads.
+_clients_lock = threading.Lock()
+
+
+class ClientPoolStats:
+    """
+    Counts the HTTP requests a client has in flight. When the peak gets close
+    to max_pool_connections, requests are queuing for a connection and the
+    pool should be made bigger.
+    """
+
+    def __init__(self, service: str, region: str):
+        self.service = service
+        self.region = region
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        # Requests sent while every pooled connection was already in use
+        self.waited_for_connection = 0
+        self._lock = threading.Lock()
+
+    def request_sent(self, **kwargs):
+        with self._lock:
+            if self.in_flight >= CLIENT_CONFIG.max_pool_connections:
+                self.waited_for_connection += 1
+            self.in_flight += 1
+            self.total_requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def response_received(self, **kwargs):
+        with self._lock:
+            self.in_flight -= 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "service": self.service,
+                "region": self.region,
+                "max_pool_connections": CLIENT_CONFIG.max_pool_connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "total_requests": self.total_requests,
+                "waited_for_connection": self.waited_for_connection
+            }
+
+
+_pool_stats: dict[tuple[str, str], ClientPoolStats] = {}
+
+
+def get_client(service: str, region: str = None):
+    """
+    Get the client for an AWS service in a region (the default region if
+    none is given). Clients are built on first use and then reused.
+    """
+    key = (service, region or config.AWS_DEFAULT_REGION)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _session.client(
+                    service, region_name=key[1], config=CLIENT_CONFIG
+                )
+                stats = ClientPoolStats(*key)
+                client.meta.events.register("before-send", stats.request_sent)
+                client.meta.events.register(
+                    "response-received", stats.response_received
+                )
+                _pool_stats[key] = stats
+                _clients[key] = client
+    return client
+
+
+def get_pool_stats() -> list[dict]:
+    with _clients_lock:
+        stats = list(_pool_stats.values())
+    return [client_stats.as_dict() for client_stats in stats]
@@ -1,23 +1,138 @@
-import boto3
 from fastapi import HTTPException
+from botocore.exceptions import ClientError, WaiterError
 import json
-from fastapi import File
+import queue
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, Optional
+from app import jobs, config
+from app.aws_clients import get_client
+from app.inventory import (
+    inventory_cache, EC2_INSTANCES, S3_BUCKETS, DNS_ZONES
+)
 
 
-DEFAULT_REGION = "us-east-1"
+DEFAULT_REGION = config.AWS_DEFAULT_REGION
+REGIONS = config.AWS_REGIONS
 
-boto_session = boto3.Session(
-    profile_name="resoursphere",region_name=DEFAULT_REGION
-)
-ec2 = boto_session.client('ec2')
-s3 = boto_session.client('s3')
-route53 = boto_session.client('route53')
+# S3 bucket operations are redirected to the bucket's region by boto3, and
+# Route53 is a global service, so both use a default region client
+s3 = get_client('s3')
+route53 = get_client('route53')
+
+S3_TAG_SCAN_WORKERS = config.S3_TAG_SCAN_WORKERS
+S3_EMPTY_BUCKET_WORKERS = config.S3_EMPTY_BUCKET_WORKERS
+# Tag changes can take several minutes to reach the Resource Groups
+# Tagging API, so newer buckets missing from it have their tags read
+S3_TAG_INDEX_LAG_SECONDS = 15 * 60
+# Most keys a single delete_objects call accepts
+S3_DELETE_BATCH_SIZE = 1000
+S3_PRESIGNED_URL_EXPIRATION = config.S3_PRESIGNED_URL_EXPIRATION_SECONDS
+# Buckets never move, so their region is looked up once
+_bucket_regions: dict[str, str] = {}
+# Uploads store the MD5 of their content in this metadata key (sent as the
+# x-amz-meta-md5 header), so unchanged files can be detected before upload
+S3_MD5_METADATA_KEY = "md5"
 
 DEFAULT_VPC_ID = "vpc-08879d17f5e284b80"
-DEFAULT_SUBNET_ID = "subnet-07d6bb7b15ccc8452"
+DEFAULT_SUBNET_ID = config.AWS_REGION_SUBNETS.get(DEFAULT_REGION)
+
+def resolve_region(region: str = None) -> str:
+    """Return the region to use, making sure it's enabled in the config"""
+    region = region or DEFAULT_REGION
+    if region not in REGIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Region {region} is not enabled in ResourSphere. "
+            f"Available regions: {', '.join(REGIONS)}"
+        )
+    return region
+
+def _get_subnet_id(region: str) -> str:
+    if region == DEFAULT_REGION:
+        return DEFAULT_SUBNET_ID
+    return config.AWS_REGION_SUBNETS.get(region)
+
+_REGION_DONE = object()
+# Items each region can read ahead of the consumer
+FAN_OUT_READ_AHEAD = 4
+# How often a region thread blocked on a full queue checks for a stop
+FAN_OUT_PUT_TIMEOUT_SECONDS = 0.1
+
+def _fan_out_over_regions(
+    regions: list[str], iter_region: Callable[[str], Iterator]
+) -> Iterator:
+    """
+    Run iter_region for every region in parallel, and yield items from all
+    of them as they arrive. Listing all regions takes about as long as the
+    slowest one, not the sum of all of them.
+    Regions only read a few items ahead of the consumer, and stop reading
+    once the consumer stops (or the generator is closed).
+    """
+    items = queue.Queue(maxsize=len(regions) * FAN_OUT_READ_AHEAD)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        """Queue the item, unless the consumer stopped first"""
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=FAN_OUT_PUT_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
 
-def launch_ec2_instance(name: str, instance_type: str, ami: str, user: str) -> dict:
+    def read_region(region: str):
+        region_items = iter_region(region)
+        try:
+            for item in region_items:
+                if not put(item):
+                    break
+        finally:
+            if hasattr(region_items, "close"):
+                region_items.close()
+            put(_REGION_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=len(regions))
+    try:
+        futures = [executor.submit(read_region, region) for region in regions]
+        remaining = len(regions)
+        while remaining:
+            item = items.get()
+            if item is _REGION_DONE:
+                remaining -= 1
+            else:
+                yield item
+        # Raise the error of a region that failed, if any
+        for future in futures:
+            future.result()
+    finally:
+        # Don't block if the caller stopped reading early, but let the
+        # region threads know, so they stop paginating
+        stopped.set()
+        executor.shutdown(wait=False)
+
+
+def launch_ec2_instance(
+    name: str,
+    instance_type: str,
+    ami: str,
+    user: str,
+    region: str = None,
+    count: int = 1,
+    on_launched: Callable[[], None] = None
+) -> dict:
+    """
+    Launch count instances with a single run_instances call, and wait for
+    all of them together. When launching more than one instance, they are
+    renamed {name}-1 ... {name}-{count} (the result has each one's name).
+    on_launched is called once the instances exist and are in the
+    inventory, before waiting for them to be running.
+    """
+    region = region or DEFAULT_REGION
+    ec2 = get_client('ec2', region)
     
     # Create tags for the instance
     tags = [
@@ -35,79 +150,89 @@ def launch_ec2_instance(name: str, instance_type: str, ami: str, user: str) -> d
         }
     ]
     
-    # Launch the EC2 instance
+    # Launch the EC2 instances (in the region's default VPC if no subnet
+    # was configured for it). MinCount == MaxCount, so either all of them
+    # are launched or none.
+    launch_options = {}
+    subnet_id = _get_subnet_id(region)
+    if subnet_id:
+        launch_options['SubnetId'] = subnet_id
+    jobs.report_progress(f"Launching {count} instance(s) in {region}")
     response = ec2.run_instances(
         ImageId=ami,
         InstanceType=instance_type,
-        MinCount=1,
-        MaxCount=1,
-        SubnetId=DEFAULT_SUBNET_ID,
+        MinCount=count,
+        MaxCount=count,
         TagSpecifications=[
             {
                 'ResourceType': 'instance',
                 'Tags': tags
             }
-        ]
+        ],
+        **launch_options
     )
     
-    instance = response['Instances'][0]
-    instance_id = instance['InstanceId']
+    instance_ids = [
+        instance['InstanceId'] for instance in response['Instances']
+    ]
+    inventory_cache.invalidate(EC2_INSTANCES, user)
+    if on_launched:
+        on_launched()
+
+    # A single instance is named by its launch tags. Each instance of a
+    # batch is renamed with its own create_tags call (through the region's
+    # client, which retries throttled calls). An instance that can't be
+    # renamed keeps the batch's name, and the others are still renamed.
+    names = {instance_id: name for instance_id in instance_ids}
+    if count > 1:
+        for index, instance_id in enumerate(instance_ids, start=1):
+            try:
+                ec2.create_tags(
+                    Resources=[instance_id],
+                    Tags=[{'Key': 'Name', 'Value': f"{name}-{index}"}]
+                )
+                names[instance_id] = f"{name}-{index}"
+            except ClientError:
+                pass
+        inventory_cache.invalidate(EC2_INSTANCES, user)
     
-    # Wait for the instance to be running and have a public IP
+    # Wait for the instances to be running and have a public IP
+    jobs.report_progress(
+        f"Waiting for {len(instance_ids)} instance(s) to be running"
+    )
     waiter = ec2.get_waiter('instance_running')
-    waiter.wait(InstanceIds=[instance_id])
+    waiter.wait(InstanceIds=instance_ids)
     
-    # Get the public IP address
-    instance_info = ec2.describe_instances(InstanceIds=[instance_id])
-    public_ip = instance_info['Reservations'][0]['Instances'][0]['PublicIpAddress']
-    
-    return {
-        "instance_id": instance_id,
-        "public_ip": public_ip
-    }
+    inventory_cache.invalidate(EC2_INSTANCES, user)
 
-def terminate_ec2_instance(instance_id: str, user: str) -> dict:
-    # Verify the instance exists
-    filters = [
-        {
-            'Name': 'instance-id',
-            'Values': [instance_id]
-        },
-        # {
-        #     'Name': 'tag:Owner',
-        #     'Values': [user]
-        # },
-        {
-            'Name': 'tag:ManagedBy',
-            'Values': ['ResourSphere']
-        }
-    ]
-    
-    response = ec2.describe_instances(Filters=filters)
-    
-    if not response['Reservations']:
-        raise ValueError(f"Instance not found")
-    # Check if the instance is already terminated
-    # instance_state = response['Reservations'][0]['Instances'][0]['State']['Name']
-    # if instance_state == 'terminated':
-    #     return {
-    #         "instance_id": instance_id,
-    #         "status": "already terminated"
-    #     }
-
-    # Terminate the instance
-    ec2.terminate_instances(InstanceIds=[instance_id])
-    
-    # Wait for the instance to be terminated
-    waiter = ec2.get_waiter('instance_terminated')
-    waiter.wait(InstanceIds=[instance_id])
+    # Get the public IP addresses
+    instance_info = ec2.describe_instances(InstanceIds=instance_ids)
+    public_ips = {
+        instance['InstanceId']: instance.get('PublicIpAddress', 'N/A')
+        for reservation in instance_info['Reservations']
+        for instance in reservation['Instances']
+    }
     
     return {
-        "instance_id": instance_id,
-        "status": "terminated"
+        "instances": [
+            {
+                "instance_id": instance_id,
+                "name": names[instance_id],
+                "public_ip": public_ips.get(instance_id, 'N/A')
+            }
+            for instance_id in instance_ids
+        ],
+        "region": region
     }
 
-def get_ec2_instances_by_user(user: str, state: str = None) -> list[dict]:
+def _iter_region_ec2_instance_pages(
+    user: str, region: str, state: str = None, name_prefix: str = None
+) -> Iterator[list[dict]]:
+    """
+    Yield the user's instances in a region one describe_instances page at a
+    time, following NextToken until the last page.
+    """
+    ec2 = get_client('ec2', region)
     filters =[
         {
             'Name': 'tag:Owner',
@@ -124,86 +249,233 @@ def get_ec2_instances_by_user(user: str, state: str = None) -> list[dict]:
             'Name': 'instance-state-name',
             'Values': [state]
         })
+    if name_prefix:
+        filters.append({
+            'Name': 'tag:Name',
+            'Values': [f"{name_prefix}*"]
+        })
 
-    response = ec2.describe_instances(Filters=filters)
-    
-    instances = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instance_info = {
-                "instance_id": instance['InstanceId'],
-                "public_ip": instance.get('PublicIpAddress', 'N/A'),
-                "name": next((tag['Value'] for tag in instance['Tags'] if tag['Key'] == 'Name'), '[No Name]'),
-                "state": instance['State']['Name']
-            }
-            instances.append(instance_info)
-    
-    return instances
+    paginator = ec2.get_paginator('describe_instances')
+    for page in paginator.paginate(Filters=filters):
+        instances = []
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                instance_info = {
+                    "instance_id": instance['InstanceId'],
+                    "public_ip": instance.get('PublicIpAddress', 'N/A'),
+                    "name": next((tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'), '[No Name]'),
+                    "state": instance['State']['Name'],
+                    "region": region
+                }
+                instances.append(instance_info)
+        yield instances
 
-def start_ec2_instance(instance_id: str) -> dict:
-    try:
-        ec2.start_instances(InstanceIds=[instance_id])
-        
-        # Wait for the instance to be running
-        waiter = ec2.get_waiter('instance_running')
-        waiter.wait(InstanceIds=[instance_id])
-        
-        return {
-            "instance_id": instance_id,
-            "status": "started"
-        }
-    except ec2.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == 'InvalidInstanceID.NotFound':
-            raise HTTPException(
-                status_code=404,
-                detail=f"API Error: Instance {instance_id} not found"
+def iter_ec2_instance_pages(
+    user: str,
+    state: str = None,
+    name_prefix: str = None,
+    regions: list[str] = None
+) -> Iterator[list[dict]]:
+    """
+    Yield pages of the user's instances from all regions (or the given
+    ones), read in parallel.
+    """
+    return _fan_out_over_regions(
+        regions or REGIONS,
+        lambda region: _iter_region_ec2_instance_pages(
+            user, region, state, name_prefix
+        )
+    )
+
+def iter_ec2_instances_by_user(
+    user: str,
+    state: str = None,
+    name_prefix: str = None,
+    regions: list[str] = None
+) -> Iterator[dict]:
+    for page in iter_ec2_instance_pages(user, state, name_prefix, regions):
+        yield from page
+
+def get_ec2_instances_by_user(
+    user: str, state: str = None, regions: list[str] = None
+) -> list[dict]:
+    return list(iter_ec2_instances_by_user(user, state, regions=regions))
+
+# Batched instance state changes: action -> (EC2 API method, waiter,
+# state the instances should reach, status reported for them)
+EC2_STATE_CHANGES = {
+    "start": ("start_instances", "instance_running", "running", "started"),
+    "stop": ("stop_instances", "instance_stopped", "stopped", "stopped"),
+    "terminate": (
+        "terminate_instances", "instance_terminated", "terminated",
+        "terminated"
+    ),
+}
+
+# Most instance IDs a single EC2 call accepts, and most values of a
+# describe_instances filter
+EC2_INSTANCE_IDS_BATCH_SIZE = 1000
+EC2_FILTER_VALUES_BATCH_SIZE = 200
+
+def _change_region_instances_state(
+    action: str,
+    instance_ids: list[str],
+    user: str,
+    region: str,
+    job_id: str = None
+) -> list[dict]:
+    """
+    Apply a state change to instances in a single region, with one call
+    per EC2_INSTANCE_IDS_BATCH_SIZE instances, and poll them with shared
+    waiters. A batch the API rejects fails on its own, the other batches
+    go on. Progress is reported to the job with job_id, as this runs in
+    its own thread.
+    """
+    api_method, waiter_name, target_state, status = EC2_STATE_CHANGES[action]
+    ec2 = get_client('ec2', region)
+    paginator = ec2.get_paginator('describe_instances')
+
+    # Only act on instances that are still managed by ResourSphere
+    managed_ids = set()
+    for i in range(0, len(instance_ids), EC2_FILTER_VALUES_BATCH_SIZE):
+        for page in paginator.paginate(Filters=[
+            {
+                'Name': 'instance-id',
+                'Values': instance_ids[i:i + EC2_FILTER_VALUES_BATCH_SIZE]
+            },
+            {
+                'Name': 'tag:ManagedBy',
+                'Values': ['ResourSphere']
+            }
+        ]):
+            managed_ids.update(
+                instance['InstanceId']
+                for reservation in page['Reservations']
+                for instance in reservation['Instances']
             )
-        else:
-            raise HTTPException(status_code=500, detail=f"API Error: {e}")
-
-def stop_ec2_instance(instance_id: str) -> dict:
-    # Check if instance exists
-    # try:
-    #     ec2.describe_instances(InstanceIds=[instance_id])
-    # except ec2.exceptions.ClientError as e:
-    #     if e.response['Error']['Code'] == 'InvalidInstanceID.NotFound':
-    #         raise HTTPException(
-    #             status_code=404,
-    #             detail=f"API Error: Instance {instance_id} not found"
-    #         )
-    try:
-        ec2.stop_instances(InstanceIds=[instance_id])
-        # Wait for the instance to be stopped
-        waiter = ec2.get_waiter('instance_stopped')
-        waiter.wait(InstanceIds=[instance_id])
-        
-        return {
+    results = {
+        instance_id: {
             "instance_id": instance_id,
-            "status": "stopped"
+            "region": region,
+            "status": "not found"
         }
-    except ec2.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == 'InvalidInstanceID.NotFound':
-            raise HTTPException(
-                status_code=404,
-                detail=f"API Error: Instance {instance_id} not found"
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"API Error: {e}"
+        for instance_id in instance_ids if instance_id not in managed_ids
+    }
+    target_ids = [
+        instance_id for instance_id in instance_ids
+        if instance_id in managed_ids
+    ]
+    batches = [
+        target_ids[i:i + EC2_INSTANCE_IDS_BATCH_SIZE]
+        for i in range(0, len(target_ids), EC2_INSTANCE_IDS_BATCH_SIZE)
+    ]
+
+    changed_batches = []
+    for batch in batches:
+        try:
+            getattr(ec2, api_method)(InstanceIds=batch)
+            changed_batches.append(batch)
+        except ClientError as e:
+            for instance_id in batch:
+                results[instance_id] = {
+                    "instance_id": instance_id,
+                    "region": region,
+                    "status": "failed",
+                    "error": f"API Error: {e}"
+                }
+    if not changed_batches:
+        return [results[instance_id] for instance_id in instance_ids]
+    inventory_cache.invalidate(EC2_INSTANCES, user)
+
+    changed_count = sum(len(batch) for batch in changed_batches)
+    jobs.report_progress(
+        f"Waiting for {changed_count} instance(s) in {region} "
+        f"to be {target_state}",
+        job_id
+    )
+    waiter = ec2.get_waiter(waiter_name)
+    for batch in changed_batches:
+        try:
+            waiter.wait(InstanceIds=batch)
+        except WaiterError:
+            # Some instances didn't get there, their state is reported below
+            pass
+    inventory_cache.invalidate(EC2_INSTANCES, user)
+
+    states = {}
+    for batch in changed_batches:
+        for page in paginator.paginate(InstanceIds=batch):
+            states.update(
+                (instance['InstanceId'], instance['State']['Name'])
+                for reservation in page['Reservations']
+                for instance in reservation['Instances']
             )
+    for batch in changed_batches:
+        for instance_id in batch:
+            state = states.get(instance_id, "unknown")
+            results[instance_id] = {
+                "instance_id": instance_id,
+                "region": region,
+                "status": status if state == target_state else "failed",
+                "state": state
+            }
+
+    return [results[instance_id] for instance_id in instance_ids]
+
+def change_ec2_instances_state(
+    action: str, instances: list[dict], user: str
+) -> dict:
+    """
+    Start, stop or terminate instances (dicts with instance_id and region,
+    as returned by get_ec2_instances_by_user). Each region's instances are
+    changed in batched calls, and regions are handled in parallel.
+    Returns the result of every instance, and how many succeeded.
+    """
+    instance_ids_by_region = {}
+    for instance in instances:
+        instance_ids_by_region.setdefault(
+            instance["region"], []
+        ).append(instance["instance_id"])
+
+    # Regions are handled in other threads, which don't know the job
+    job_id = jobs.current_job_id()
+    results = []
+    for region_results in _fan_out_over_regions(
+        list(instance_ids_by_region),
+        lambda region: [_change_region_instances_state(
+            action, instance_ids_by_region[region], user, region, job_id
+        )]
+    ):
+        results.extend(region_results)
+        jobs.report_progress(
+            f"{len(results)}/{len(instances)} instance(s) done"
+        )
+
+    _, _, _, status = EC2_STATE_CHANGES[action]
+    return {
+        "instances": results,
+        "succeeded": sum(result["status"] == status for result in results),
+        "failed": sum(result["status"] != status for result in results)
+    }
 
 def construct_bucket_url(bucket_name: str) -> str:
     return f"https://{bucket_name}.s3.amazonaws.com"
 
-def create_s3_bucket(name: str, user: str, public: bool = False) -> dict:
+def create_s3_bucket(
+    name: str, user: str, public: bool = False, region: str = None
+) -> dict:
+    region = region or DEFAULT_REGION
+    s3 = get_client('s3', region)
     try:
-        # Create the S3 bucket
+        # Create the S3 bucket. us-east-1 is the default location, and
+        # doesn't accept a location constraint
+        bucket_options = {}
+        if region != 'us-east-1':
+            bucket_options['CreateBucketConfiguration'] = {
+                'LocationConstraint': region
+            }
         response = s3.create_bucket(
-            Bucket=name,
-            # CreateBucketConfiguration={
-            #     'LocationConstraint': DEFAULT_REGION
-            # }
+            Bucket=name, **bucket_options
         )
         
         # Add tags to the bucket
@@ -223,6 +495,7 @@ def create_s3_bucket(name: str, user: str, public: bool = False) -> dict:
             Bucket=name,
             Tagging=tagging
         )
+        inventory_cache.invalidate(S3_BUCKETS, user)
         
         # If public access is requested, update the bucket policy
         if public:
@@ -255,13 +528,15 @@ def create_s3_bucket(name: str, user: str, public: bool = False) -> dict:
                 Policy=json.dumps(bucket_policy)
             )        
         # Wait until the bucket exists and is accessible
+        jobs.report_progress(f"Waiting for bucket {name} to be available")
         waiter = s3.get_waiter('bucket_exists')
         waiter.wait(Bucket=name)
         
         return {
             "bucket_name": name,
             "status": "created",
-            "bucket_url": construct_bucket_url(name)
+            "bucket_url": construct_bucket_url(name),
+            "region": region
         }
     except s3.exceptions.ClientError as e:
         error_code = e.response['Error']['Code']
@@ -277,51 +552,183 @@ def create_s3_bucket(name: str, user: str, public: bool = False) -> dict:
             )
 
 
+def _is_bucket_managed_by_user(bucket_name: str, user: str = None) -> bool:
+    try:
+        tags = s3.get_bucket_tagging(Bucket=bucket_name)['TagSet']
+    except s3.exceptions.ClientError:
+        # Skip buckets where we can't read tags
+        return False
+
+    managed_by_resoursphere = False
+    owned_by_user = False
+    for tag in tags:
+        if tag['Key'] == 'ManagedBy' and tag['Value'] == 'ResourSphere':
+            managed_by_resoursphere = True
+        if tag['Key'] == 'Owner' and tag['Value'] == user:
+            owned_by_user = True
+    return managed_by_resoursphere and (not user or owned_by_user)
+
+
+def _get_managed_bucket_names_from_tag_index(user: str = None) -> set[str]:
+    """
+    Resolve ResourSphere buckets with the Resource Groups Tagging API, which
+    returns only resources carrying our tags, page by page. The tagging API
+    is regional, so all regions are queried in parallel.
+    """
+    tag_filters = [{'Key': 'ManagedBy', 'Values': ['ResourSphere']}]
+    if user:
+        tag_filters.append({'Key': 'Owner', 'Values': [user]})
+
+    def iter_region_bucket_names(region: str) -> Iterator[str]:
+        tagging = get_client('resourcegroupstaggingapi', region)
+        paginator = tagging.get_paginator('get_resources')
+        for page in paginator.paginate(
+            TagFilters=tag_filters, ResourceTypeFilters=['s3']
+        ):
+            for resource in page['ResourceTagMappingList']:
+                # Bucket ARNs look like arn:aws:s3:::bucket-name
+                yield resource['ResourceARN'].split(':::')[-1]
+
+    return set(_fan_out_over_regions(REGIONS, iter_region_bucket_names))
+
+
+def _scan_managed_bucket_names(
+    bucket_names: list[str], user: str = None
+) -> set[str]:
+    """
+    Fallback for when the tagging API can't be used: read each bucket's
+    tags, with a bounded number of requests in flight.
+    """
+    with ThreadPoolExecutor(max_workers=S3_TAG_SCAN_WORKERS) as executor:
+        matches = executor.map(
+            lambda bucket_name: _is_bucket_managed_by_user(bucket_name, user),
+            bucket_names
+        )
+        return {
+            bucket_name
+            for bucket_name, managed in zip(bucket_names, matches) if managed
+        }
+
+
 def get_s3_buckets(user: str = None) -> list[dict]:
-    # Get all buckets first
+    # Get all buckets first. A single call, which also filters out buckets
+    # that were deleted but are still listed by the tagging index
     response = s3.list_buckets()
-    
-    buckets = []
-    for bucket in response['Buckets']:
-        try:
-            # Get tags for each bucket
-            tags = s3.get_bucket_tagging(Bucket=bucket['Name'])['TagSet']
-            
-            # Check if bucket matches our filters
-            managed_by_resoursphere = False
-            owned_by_user = False
-            
-            for tag in tags:
-                if tag['Key'] == 'ManagedBy' and tag['Value'] == 'ResourSphere':
-                    managed_by_resoursphere = True
-                if tag['Key'] == 'Owner' and tag['Value'] == user:
-                    owned_by_user = True
-            
-            # Only include bucket if it matches our filters
-            if managed_by_resoursphere and (not user or owned_by_user):
-                bucket_description = {
-                    "name": bucket['Name'],
-                    "url": construct_bucket_url(bucket['Name'])
-                }
-                buckets.append(bucket_description)
-                
-        except s3.exceptions.ClientError as e:
-            # Skip buckets where we can't read tags
-            continue
-            
-    return buckets
+    all_bucket_names = [bucket['Name'] for bucket in response['Buckets']]
+
+    try:
+        managed_bucket_names = _get_managed_bucket_names_from_tag_index(user)
+        # The index may not have the tags of recently created buckets yet
+        recent_after = datetime.now(timezone.utc) - timedelta(
+            seconds=S3_TAG_INDEX_LAG_SECONDS
+        )
+        managed_bucket_names |= _scan_managed_bucket_names([
+            bucket['Name'] for bucket in response['Buckets']
+            if bucket['Name'] not in managed_bucket_names
+            and bucket['CreationDate'] > recent_after
+        ], user)
+    except ClientError:
+        managed_bucket_names = _scan_managed_bucket_names(
+            all_bucket_names, user
+        )
+
+    return [
+        {
+            "name": bucket_name,
+            "url": construct_bucket_url(bucket_name)
+        }
+        for bucket_name in all_bucket_names
+        if bucket_name in managed_bucket_names
+    ]
+
+def _iter_s3_object_version_batches(bucket_name: str) -> Iterator[list]:
+    """
+    Yield every version and delete marker in the bucket (or every object,
+    if versioning was never enabled) in batches for delete_objects.
+    """
+    batch = []
+    paginator = s3.get_paginator('list_object_versions')
+    for page in paginator.paginate(Bucket=bucket_name):
+        versions = page.get('Versions', []) + page.get('DeleteMarkers', [])
+        for version in versions:
+            batch.append({
+                'Key': version['Key'],
+                'VersionId': version['VersionId']
+            })
+            if len(batch) == S3_DELETE_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
 
-def delete_s3_bucket(bucket_name: str) -> dict:
+def _delete_s3_objects_batch(bucket_name: str, objects: list[dict]) -> int:
+    response = s3.delete_objects(
+        Bucket=bucket_name, Delete={'Objects': objects, 'Quiet': True}
+    )
+    errors = response.get('Errors', [])
+    if errors:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete {len(errors)} object(s) from bucket "
+            f"{bucket_name}, e.g. {errors[0]['Key']}: {errors[0]['Message']}"
+        )
+    return len(objects)
+
+def empty_s3_bucket(bucket_name: str) -> int:
+    """
+    Delete all objects and object versions in the bucket, 1000 keys per
+    delete_objects call, with S3_EMPTY_BUCKET_WORKERS calls in parallel.
+    Listing stays only a few batches ahead of the deletes, so memory use
+    doesn't grow with the size of the bucket.
+    Returns the number of objects and versions deleted.
+    """
+    deleted = 0
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=S3_EMPTY_BUCKET_WORKERS) as executor:
+        def collect(futures):
+            nonlocal deleted
+            for future in futures:
+                deleted += future.result()
+            jobs.report_progress(
+                f"Deleted {deleted} object(s) from bucket {bucket_name}"
+            )
+
+        for batch in _iter_s3_object_version_batches(bucket_name):
+            in_flight.add(
+                executor.submit(_delete_s3_objects_batch, bucket_name, batch)
+            )
+            if len(in_flight) >= S3_EMPTY_BUCKET_WORKERS * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(in_flight)
+    return deleted
+
+def delete_s3_bucket(
+    bucket_name: str, user: str = None, force: bool = False
+) -> dict:
+    """
+    Delete the bucket. With force, all its objects and versions are
+    deleted first, as S3 only deletes empty buckets.
+    """
     try:
+        deleted_objects = 0
+        if force:
+            jobs.report_progress(f"Deleting the objects in {bucket_name}")
+            deleted_objects = empty_s3_bucket(bucket_name)
         s3.delete_bucket(Bucket=bucket_name)
+        inventory_cache.invalidate(S3_BUCKETS, user)
+        # The name can be reused for a bucket in another region
+        _bucket_regions.pop(bucket_name, None)
         
         # Wait until the bucket is deleted
+        jobs.report_progress(f"Waiting for bucket {bucket_name} to be deleted")
         waiter = s3.get_waiter('bucket_not_exists')
         waiter.wait(Bucket=bucket_name)
         
         return {
             "bucket_name": bucket_name,
-            "status": "deleted"
+            "status": "deleted",
+            "deleted_objects": deleted_objects
         }
     except s3.exceptions.NoSuchBucket as e:
         raise HTTPException(
@@ -329,25 +736,300 @@ def delete_s3_bucket(bucket_name: str) -> dict:
             detail=f"Bucket {bucket_name} does not exist."
         )
     except s3.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == 'BucketNotEmpty':
+            raise HTTPException(
+                status_code=409,
+                detail=f"Bucket {bucket_name} is not empty. Use force to "
+                "delete its objects along with it."
+            )
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting bucket: {e}"
         )
 
 
-def upload_file_to_s3_bucket(bucket_name: str, file: File) -> dict:
+def iter_s3_objects(bucket_name: str, prefix: str = "") -> Iterator[dict]:
+    """Yield the bucket's objects, following list_objects_v2 pages"""
+    paginator = s3.get_paginator('list_objects_v2')
     try:
-        file.file.seek(0)
-        s3.upload_fileobj(file.file, bucket_name, file.filename)
-        return {
-            "bucket_name": bucket_name,
-            "file_name": file.filename,
-            "status": "uploaded"
-        }
-    except s3.exceptions.ClientError as e:
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for s3_object in page.get('Contents', []):
+                yield {
+                    "key": s3_object['Key'],
+                    "size": s3_object['Size'],
+                    "last_modified": s3_object['LastModified'],
+                    "etag": s3_object['ETag']
+                }
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+
+def list_s3_objects_page(
+    bucket_name: str,
+    prefix: str = "",
+    delimiter: str = None,
+    cursor: str = None,
+    limit: int = 1000
+) -> dict:
+    """
+    One list_objects_v2 page of the bucket. With a delimiter, keys that
+    share a prefix up to it are grouped into common_prefixes.
+    next_cursor is the continuation token of the next page, if any.
+    """
+    options = {'Prefix': prefix, 'MaxKeys': limit}
+    if delimiter:
+        options['Delimiter'] = delimiter
+    if cursor:
+        options['ContinuationToken'] = cursor
+    try:
+        response = s3.list_objects_v2(Bucket=bucket_name, **options)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'InvalidArgument':
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+    return {
+        "objects": [
+            {
+                "key": s3_object['Key'],
+                "size": s3_object['Size'],
+                "last_modified": s3_object['LastModified'].isoformat(),
+                "etag": s3_object['ETag'],
+                "storage_class": s3_object.get('StorageClass')
+            }
+            for s3_object in response.get('Contents', [])
+        ],
+        "common_prefixes": [
+            common_prefix['Prefix']
+            for common_prefix in response.get('CommonPrefixes', [])
+        ],
+        "next_cursor": response.get('NextContinuationToken')
+    }
+
+def get_s3_objects_by_key(bucket_name: str, prefix: str = "") -> dict:
+    return {
+        s3_object["key"]: s3_object
+        for s3_object in iter_s3_objects(bucket_name, prefix)
+    }
+
+def _md5_metadata(md5: str = None) -> dict:
+    return {'Metadata': {S3_MD5_METADATA_KEY: md5}} if md5 else {}
+
+def head_s3_object(bucket_name: str, key: str) -> Optional[dict]:
+    """Return the object's details, or None if it doesn't exist"""
+    try:
+        response = s3.head_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+    return {
+        "key": key,
+        "size": response['ContentLength'],
+        "etag": response['ETag'],
+        "content_type": response.get('ContentType'),
+        "metadata": response.get('Metadata', {})
+    }
+
+def s3_object_matches_md5(s3_object: dict, md5: str) -> bool:
+    """
+    Whether the object has the content with this MD5, by its ETag or by the
+    MD5 stored in its metadata (which needs a head_object)
+    """
+    # Objects uploaded in one part (and not encrypted with KMS) have the
+    # MD5 of their content as ETag. Multipart ETags end with -<parts>.
+    etag = s3_object["etag"].strip('"')
+    if "-" not in etag and etag == md5:
+        return True
+    return s3_object.get("metadata", {}).get(S3_MD5_METADATA_KEY) == md5
+
+def find_unchanged_s3_object(
+    bucket_name: str, key: str, md5: str
+) -> Optional[dict]:
+    """
+    Return the object if it already has this content, so uploading it again
+    can be skipped. The object is only read.
+    """
+    s3_object = head_s3_object(bucket_name, key)
+    if s3_object is None or not s3_object_matches_md5(s3_object, md5):
+        return None
+    return s3_object
+
+def put_s3_object(
+    bucket_name: str, key: str, body: bytes, md5: str = None
+) -> dict:
+    try:
+        s3.put_object(
+            Bucket=bucket_name, Key=key, Body=body, **_md5_metadata(md5)
+        )
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+    return {
+        "bucket_name": bucket_name,
+        "file_name": key,
+        "status": "uploaded"
+    }
+
+def create_s3_multipart_upload(
+    bucket_name: str, key: str, md5: str = None
+) -> str:
+    """Start a multipart upload and return its upload ID"""
+    try:
+        response = s3.create_multipart_upload(
+            Bucket=bucket_name, Key=key, **_md5_metadata(md5)
+        )
+    except ClientError as e:
         raise HTTPException(
             status_code=500, detail=f"AWS API returned error: {e}"
         )
+    return response['UploadId']
+
+def upload_s3_part(
+    bucket_name: str,
+    key: str,
+    upload_id: str,
+    part_number: int,
+    body: bytes
+) -> dict:
+    try:
+        response = s3.upload_part(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+    return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+def complete_s3_multipart_upload(
+    bucket_name: str, key: str, upload_id: str, parts: list[dict]
+) -> dict:
+    """parts: {'PartNumber', 'ETag'} of every uploaded part"""
+    try:
+        s3.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': sorted(parts, key=lambda part: part['PartNumber'])
+            }
+        )
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+    return {
+        "bucket_name": bucket_name,
+        "file_name": key,
+        "status": "uploaded"
+    }
+
+def abort_s3_multipart_upload(
+    bucket_name: str, key: str, upload_id: str
+) -> dict:
+    """Abort a multipart upload, so its parts don't keep using storage"""
+    try:
+        s3.abort_multipart_upload(
+            Bucket=bucket_name, Key=key, UploadId=upload_id
+        )
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"AWS API returned error: {e}"
+        )
+    return {
+        "bucket_name": bucket_name,
+        "file_name": key,
+        "status": "aborted"
+    }
+
+
+def get_s3_bucket_region(bucket_name: str) -> str:
+    region = _bucket_regions.get(bucket_name)
+    if region is None:
+        try:
+            response = s3.get_bucket_location(Bucket=bucket_name)
+        except ClientError as e:
+            raise HTTPException(
+                status_code=500, detail=f"AWS API returned error: {e}"
+            )
+        # Buckets in us-east-1 have no location constraint
+        region = response.get('LocationConstraint') or 'us-east-1'
+        _bucket_regions[bucket_name] = region
+    return region
+
+def _get_presigning_client(bucket_name: str):
+    # Presigned URLs must be signed for the bucket's own region
+    return get_client('s3', get_s3_bucket_region(bucket_name))
+
+def generate_s3_upload_url(
+    bucket_name: str, key: str, md5: str = None
+) -> str:
+    """
+    Presigned URL to upload an object with a single PUT. With an MD5, the
+    upload must send it in the x-amz-meta-md5 header.
+    """
+    return _get_presigning_client(bucket_name).generate_presigned_url(
+        'put_object',
+        Params={'Bucket': bucket_name, 'Key': key, **_md5_metadata(md5)},
+        ExpiresIn=S3_PRESIGNED_URL_EXPIRATION
+    )
+
+def generate_s3_upload_post(
+    bucket_name: str, key: str, md5: str = None
+) -> dict:
+    """Presigned URL and form fields to upload an object with a POST"""
+    fields = {}
+    conditions = []
+    if md5:
+        fields[f"x-amz-meta-{S3_MD5_METADATA_KEY}"] = md5
+        conditions.append({f"x-amz-meta-{S3_MD5_METADATA_KEY}": md5})
+    return _get_presigning_client(bucket_name).generate_presigned_post(
+        Bucket=bucket_name,
+        Key=key,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=S3_PRESIGNED_URL_EXPIRATION
+    )
+
+def generate_s3_upload_part_urls(
+    bucket_name: str, key: str, upload_id: str, part_count: int
+) -> list[dict]:
+    """Presigned URLs to PUT the parts of a multipart upload"""
+    client = _get_presigning_client(bucket_name)
+    return [
+        {
+            "part_number": part_number,
+            "url": client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': bucket_name,
+                    'Key': key,
+                    'UploadId': upload_id,
+                    'PartNumber': part_number
+                },
+                ExpiresIn=S3_PRESIGNED_URL_EXPIRATION
+            )
+        }
+        for part_number in range(1, part_count + 1)
+    ]
+
+def generate_s3_download_url(bucket_name: str, key: str) -> str:
+    """Presigned URL to download an object with a GET"""
+    return _get_presigning_client(bucket_name).generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket_name, 'Key': key},
+        ExpiresIn=S3_PRESIGNED_URL_EXPIRATION
+    )
 
 
 def create_dns_zone(name: str, user: str) -> dict:
@@ -379,6 +1061,7 @@ def create_dns_zone(name: str, user: str) -> dict:
                 }
             ]
         )
+        inventory_cache.invalidate(DNS_ZONES, user)
         
         return {
             "zone_id": zone_id,
@@ -392,82 +1075,402 @@ def create_dns_zone(name: str, user: str) -> dict:
         )
 
 
-def delete_dns_zone(zone_id: str) -> dict:
+def delete_dns_zone(
+    zone_id: str, user: str = None, force: bool = False
+) -> dict:
+    """
+    Delete a hosted zone. Route53 only deletes zones without records other
+    than the apex SOA and NS, unless force is set to delete the other
+    records first.
+    """
     try:
+        deleted_records = 0
+        if force:
+            zone_name = route53.get_hosted_zone(Id=zone_id)['HostedZone']['Name']
+            jobs.report_progress(f"Deleting the records of zone {zone_name}")
+            try:
+                deleted_records = empty_dns_zone(zone_id, zone_name)
+            finally:
+                inventory_cache.invalidate(DNS_ZONES, user)
+        jobs.report_progress(f"Deleting zone {zone_id}")
         route53.delete_hosted_zone(Id=zone_id)
+        inventory_cache.invalidate(DNS_ZONES, user)
         return {
             "zone_id": zone_id,
-            "status": "deleted"
+            "status": "deleted",
+            "deleted_records": deleted_records
         }
+    except route53.exceptions.HostedZoneNotEmpty:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Zone {zone_id} still has records. Delete them first, "
+            "or use force to delete them along with the zone."
+        )
     except route53.exceptions.ClientError as e:
         raise HTTPException(
             status_code=500,
             detail=f"AWS API Error: {e}"
         )
 
+# list_tags_for_resources accepts up to 10 resource IDs per call
+ROUTE53_TAGS_BATCH_SIZE = 10
+
+def normalize_zone_name(name: str) -> str:
+    """Route53 returns fully qualified zone names, with a trailing dot"""
+    name = name.lower()
+    return name if name.endswith(".") else f"{name}."
+
+def _get_dns_zones_tags(zone_ids: list[str]) -> dict[str, dict]:
+    zones_tags = {}
+    for i in range(0, len(zone_ids), ROUTE53_TAGS_BATCH_SIZE):
+        response = route53.list_tags_for_resources(
+            ResourceType='hostedzone',
+            ResourceIds=zone_ids[i:i + ROUTE53_TAGS_BATCH_SIZE]
+        )
+        for tag_set in response['ResourceTagSets']:
+            zones_tags[tag_set['ResourceId']] = {
+                tag['Key']: tag['Value'] for tag in tag_set['Tags']
+            }
+    return zones_tags
+
 def get_dns_zones_list(user: str=None) -> list[dict]:
     try:
-        # Get all hosted zones
-        response = route53.list_hosted_zones()
         zones = []
-        
-        # Process each zone to check tags
-        for zone in response['HostedZones']:
-            zone_id = zone['Id'].split('/')[-1]
-            
-            # Get tags for this zone
-            tags_response = route53.list_tags_for_resource(
-                ResourceType='hostedzone',
-                ResourceId=zone_id
-            )
-            
-            tags = {tag['Key']: tag['Value'] for tag in tags_response['ResourceTagSet']['Tags']}
-            
-            # Check if zone is managed by ResourSphere
-            if tags.get('ManagedBy') == 'ResourSphere':
-                # If user is specified, check owner tag
-                if user is None or tags.get('Owner') == user:
-                    zones.append({
-                        "zone_id": zone_id,
-                        "name": zone['Name'],
-                        # "tags": tags
-                    })
-        
+        paginator = route53.get_paginator('list_hosted_zones')
+        for page in paginator.paginate():
+            page_zones = {
+                zone['Id'].split('/')[-1]: zone for zone in page['HostedZones']
+            }
+            # Get tags for the whole page in batches
+            zones_tags = _get_dns_zones_tags(list(page_zones.keys()))
+
+            for zone_id, zone in page_zones.items():
+                tags = zones_tags.get(zone_id, {})
+                # Check if zone is managed by ResourSphere
+                if tags.get('ManagedBy') == 'ResourSphere':
+                    # If user is specified, check owner tag
+                    if user is None or tags.get('Owner') == user:
+                        zones.append({
+                            "zone_id": zone_id,
+                            "name": zone['Name'],
+                        })
+
         return zones
     except route53.exceptions.ClientError as e:
         raise HTTPException(
             status_code=500,
             detail=f"AWS API Error while asking for list of zones: {e}"
         )
-def create_dns_record(zone_id: str, name: str, type: str, value: str) -> dict:
-    try:
-        response = route53.change_resource_record_sets(
-            HostedZoneId=zone_id,
-            ChangeBatch={
-                'Changes': [
-                    {
-                        'Action': 'CREATE',
-                        'ResourceRecordSet': {
-                            'Name': name,
-                            'Type': type,
-                            'TTL': 300
-                        },
-
-                        'ResourceRecords': [{'Value': value}]
-                    }
-                ]
-            }
+
+def get_dns_zone_index(user: str) -> dict[str, dict]:
+    """
+    List the user's zones, indexed by ID and by (normalized) name, so
+    ownership lookups don't need to scan the zones list
+    """
+    zones = get_dns_zones_list(user)
+    return {
+        "zones": zones,
+        "by_id": {zone['zone_id']: zone['name'] for zone in zones},
+        "by_name": {
+            normalize_zone_name(zone['name']): zone['zone_id']
+            for zone in zones
+        }
+    }
+
+# Limits of a single change_resource_record_sets call. UPSERT changes count
+# twice towards both of them.
+ROUTE53_MAX_BATCH_RECORDS = 1000
+ROUTE53_MAX_BATCH_CHARACTERS = 32000
+ROUTE53_DEFAULT_TTL = 300
+
+def to_resource_record_set(record: dict) -> dict:
+    """
+    Convert a record ({"name", "type", "ttl", "values"}, or "alias" with
+    "hosted_zone_id", "dns_name" and "evaluate_target_health" instead of
+    values) to a Route53 ResourceRecordSet
+    """
+    record_set = {
+        'Name': normalize_zone_name(record['name']),
+        'Type': record['type'].upper()
+    }
+    alias = record.get('alias')
+    if alias:
+        record_set['AliasTarget'] = {
+            'HostedZoneId': alias['hosted_zone_id'],
+            'DNSName': normalize_zone_name(alias['dns_name']),
+            'EvaluateTargetHealth': alias.get('evaluate_target_health', False)
+        }
+    else:
+        record_set['TTL'] = record.get('ttl') or ROUTE53_DEFAULT_TTL
+        record_set['ResourceRecords'] = [
+            {'Value': value} for value in record['values']
+        ]
+    return record_set
+
+def from_resource_record_set(record_set: dict) -> dict:
+    record = {
+        "name": record_set['Name'],
+        "type": record_set['Type']
+    }
+    if 'AliasTarget' in record_set:
+        record["alias"] = {
+            "hosted_zone_id": record_set['AliasTarget']['HostedZoneId'],
+            "dns_name": record_set['AliasTarget']['DNSName'],
+            "evaluate_target_health":
+                record_set['AliasTarget']['EvaluateTargetHealth']
+        }
+    else:
+        record["ttl"] = record_set.get('TTL')
+        record["values"] = [
+            resource_record['Value']
+            for resource_record in record_set.get('ResourceRecords', [])
+        ]
+    if 'SetIdentifier' in record_set:
+        record["set_identifier"] = record_set['SetIdentifier']
+    return record
+
+def _dns_change_size(change: dict) -> tuple[int, int]:
+    """How much of the batch limits a change uses: (records, characters)"""
+    resource_records = change['ResourceRecordSet'].get('ResourceRecords', [])
+    records = max(len(resource_records), 1)
+    characters = sum(
+        len(resource_record['Value']) for resource_record in resource_records
+    )
+    weight = 2 if change['Action'] == 'UPSERT' else 1
+    return records * weight, characters * weight
+
+def iter_dns_change_batches(changes: Iterable[dict]) -> Iterator[list[dict]]:
+    """
+    Group changes, in order, into the largest change batches Route53's
+    limits allow. Each batch is yielded as soon as it's full, so changes
+    can be produced while batches are applied.
+    """
+    batch, batch_records, batch_characters = [], 0, 0
+    for change in changes:
+        records, characters = _dns_change_size(change)
+        if records > ROUTE53_MAX_BATCH_RECORDS or \
+                characters > ROUTE53_MAX_BATCH_CHARACTERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Record {change['ResourceRecordSet']['Name']} "
+                f"{change['ResourceRecordSet']['Type']} is too large for "
+                "a single Route53 change"
+            )
+        if batch and (
+            batch_records + records > ROUTE53_MAX_BATCH_RECORDS
+            or batch_characters + characters > ROUTE53_MAX_BATCH_CHARACTERS
+        ):
+            yield batch
+            batch, batch_records, batch_characters = [], 0, 0
+        batch.append(change)
+        batch_records += records
+        batch_characters += characters
+    if batch:
+        yield batch
+
+def pack_dns_changes(changes: list[dict]) -> list[list[dict]]:
+    """
+    Split changes, in order, into as few change batches as Route53's
+    limits allow
+    """
+    return list(iter_dns_change_batches(changes))
+
+def apply_dns_changes(zone_id: str, changes: list[dict]) -> dict:
+    """
+    Apply Route53 changes ({'Action', 'ResourceRecordSet'}) to the zone in
+    the fewest change batches. Batches are applied one after the other,
+    as Route53 rejects concurrent changes to the same zone. Each batch is
+    atomic, so when one fails, the batches before it stay applied.
+    """
+    batches = pack_dns_changes(changes)
+    change_ids = []
+    applied = 0
+    for batch_number, batch in enumerate(batches, start=1):
+        jobs.report_progress(
+            f"Applying change batch {batch_number}/{len(batches)}"
         )
-        return {
-            "zone_id": zone_id,
-            "name": name,
-            "type": type,
-            "value": value,
-            "status": "created"
+        try:
+            response = route53.change_resource_record_sets(
+                HostedZoneId=zone_id,
+                ChangeBatch={'Changes': batch}
+            )
+        except route53.exceptions.ClientError as e:
+            status_code = 400 if e.response['Error']['Code'] in (
+                'InvalidChangeBatch', 'InvalidInput'
+            ) else 500
+            raise HTTPException(
+                status_code=status_code,
+                detail=f"Change batch {batch_number}/{len(batches)} failed "
+                f"({applied} change(s) were applied before it): {e}"
+            )
+        change_ids.append(response['ChangeInfo']['Id'].split('/')[-1])
+        applied += len(batch)
+    return {
+        "zone_id": zone_id,
+        "changes": applied,
+        "batches": len(batches),
+        "change_ids": change_ids
+    }
+
+def change_dns_records(
+    zone_id: str, action: str, records: list[dict]
+) -> dict:
+    """Create, upsert or delete records in the zone, in batches"""
+    return apply_dns_changes(zone_id, [
+        {
+            'Action': action.upper(),
+            'ResourceRecordSet': to_resource_record_set(record)
         }
-    except route53.exceptions.ClientError as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"AWS API Error: {e}"
+        for record in records
+    ])
+
+def iter_dns_record_sets(zone_id: str) -> Iterator[dict]:
+    """Yield the zone's record sets, reading them a page at a time"""
+    paginator = route53.get_paginator('list_resource_record_sets')
+    for page in paginator.paginate(HostedZoneId=zone_id):
+        yield from page['ResourceRecordSets']
+
+def _dns_record_set_key(record_set: dict) -> tuple[str, str]:
+    # Route53 returns "*" in names escaped as "\052"
+    name = record_set['Name'].replace('\\052', '*').lower()
+    return name, record_set['Type']
+
+def _is_zone_apex_record_set(record_set: dict, zone_name: str) -> bool:
+    """Whether it's the apex SOA or NS records, which Route53 manages"""
+    name, record_type = _dns_record_set_key(record_set)
+    return record_type in ('SOA', 'NS') and name == zone_name
+
+def _is_synced_dns_record_set(record_set: dict, zone_name: str) -> bool:
+    """
+    Zone syncs leave out the apex SOA and NS records, and record sets with
+    a routing policy (a SetIdentifier)
+    """
+    return 'SetIdentifier' not in record_set \
+        and not _is_zone_apex_record_set(record_set, zone_name)
+
+def _dns_record_sets_match(current: dict, desired: dict) -> bool:
+    def values(record_set: dict) -> list[str]:
+        return sorted(
+            resource_record['Value']
+            for resource_record in record_set.get('ResourceRecords', [])
         )
+    return current.get('TTL') == desired.get('TTL') \
+        and values(current) == values(desired) \
+        and current.get('AliasTarget') == desired.get('AliasTarget')
 
+def diff_dns_record_sets(
+    zone_name: str, current: Iterable[dict], desired: list[dict]
+) -> list[dict]:
+    """
+    The fewest changes that turn the current record sets into the desired
+    ones: CREATE the missing ones, UPSERT the different ones and DELETE the
+    ones that aren't desired. Deletes come first, so a name can change
+    type (e.g. from A to CNAME) within one sync.
+    """
+    zone_name = normalize_zone_name(zone_name)
+    desired_sets = {}
+    for record_set in desired:
+        key = _dns_record_set_key(record_set)
+        if key in desired_sets:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Record {key[0]} {key[1]} is given more than once"
+            )
+        if _is_synced_dns_record_set(record_set, zone_name):
+            desired_sets[key] = record_set
+
+    deletes, upserts = [], []
+    for record_set in current:
+        if not _is_synced_dns_record_set(record_set, zone_name):
+            continue
+        desired_set = desired_sets.pop(_dns_record_set_key(record_set), None)
+        if desired_set is None:
+            deletes.append({'Action': 'DELETE', 'ResourceRecordSet': record_set})
+        elif not _dns_record_sets_match(record_set, desired_set):
+            upserts.append({
+                'Action': 'UPSERT',
+                'ResourceRecordSet': desired_set,
+                'Current': record_set
+            })
+    creates = [
+        {'Action': 'CREATE', 'ResourceRecordSet': record_set}
+        for record_set in desired_sets.values()
+    ]
+    return deletes + upserts + creates
+
+def sync_dns_records(
+    zone_id: str,
+    zone_name: str,
+    records: list[dict],
+    dry_run: bool = False
+) -> dict:
+    """
+    Make the zone's records match the given ones, with the fewest changes.
+    The zone is read a page at a time, and only the differences are
+    written, in batches. With dry_run, the changes are only returned.
+    """
+    changes = diff_dns_record_sets(
+        zone_name,
+        iter_dns_record_sets(zone_id),
+        [to_resource_record_set(record) for record in records]
+    )
+    result = {
+        "zone_id": zone_id,
+        "create": [],
+        "upsert": [],
+        "delete": [],
+        "dry_run": dry_run,
+        "batches": 0
+    }
+    for change in changes:
+        record = from_resource_record_set(change['ResourceRecordSet'])
+        if 'Current' in change:
+            record["current"] = from_resource_record_set(change.pop('Current'))
+        result[change['Action'].lower()].append(record)
+    if changes and not dry_run:
+        result["batches"] = apply_dns_changes(zone_id, changes)["batches"]
+    return result
+
+def empty_dns_zone(zone_id: str, zone_name: str) -> int:
+    """
+    Delete every record set of the zone but the apex SOA and NS, in the
+    largest batches Route53 allows. Record sets are deleted while the zone
+    is read a page at a time, and the job's progress reports how many were
+    deleted so far. Returns the number of deleted record sets.
+    """
+    zone_name = normalize_zone_name(zone_name)
+    deletes = (
+        {'Action': 'DELETE', 'ResourceRecordSet': record_set}
+        for record_set in iter_dns_record_sets(zone_id)
+        if not _is_zone_apex_record_set(record_set, zone_name)
+    )
+    deleted = 0
+    for batch in iter_dns_change_batches(deletes):
+        try:
+            route53.change_resource_record_sets(
+                HostedZoneId=zone_id,
+                ChangeBatch={'Changes': batch}
+            )
+        except route53.exceptions.ClientError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error deleting the records of zone {zone_id} "
+                f"({deleted} record set(s) were deleted before it): {e}"
+            )
+        deleted += len(batch)
+        jobs.report_progress(
+            f"Deleted {deleted} record set(s) of zone {zone_name}"
+        )
+    return deleted
+
+def create_dns_record(zone_id: str, name: str, type: str, value: str) -> dict:
+    change_dns_records(zone_id, "CREATE", [
+        {"name": name, "type": type, "values": [value]}
+    ])
+    return {
+        "zone_id": zone_id,
+        "name": name,
+        "type": type,
+        "value": value,
+        "status": "created"
+    }
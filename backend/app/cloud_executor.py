@@ -0,0 +1,37 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from app import config
+
+_executor = ThreadPoolExecutor(
+    max_workers=config.AWS_EXECUTOR_WORKERS,
+    thread_name_prefix="resoursphere-aws"
+)
+_service_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def _get_service_semaphore(service: str) -> asyncio.Semaphore:
+    semaphore = _service_semaphores.get(service)
+    if semaphore is None:
+        limit = config.AWS_SERVICE_CONCURRENCY.get(
+            service, config.AWS_EXECUTOR_WORKERS
+        )
+        semaphore = asyncio.Semaphore(limit)
+        _service_semaphores[service] = semaphore
+    return semaphore
+
+
+async def run_cloud_call(
+    service: str, func: Callable, *args, **kwargs
+) -> Any:
+    """
+    Run a blocking cloud_api function in the AWS thread pool, without
+    blocking the event loop. Calls are limited per AWS service, so a burst
+    of slow calls to one service can't take over the whole pool.
+    """
+    async with _get_service_semaphore(service):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, functools.partial(func, *args, **kwargs)
+        )
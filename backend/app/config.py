@@ -8,7 +8,75 @@ with open(f"{CURRENT_DIR}/config/security.yml", "r") as security_conf_file:
 
 ACCESS_TOKEN_EXPIRATION_MINUTES = security_config.get("access_token_expiration_minutes")
 JWT_ALGORITHM = security_config.get("jwt_algorithm")
+REFRESH_TOKEN_EXPIRATION_MINUTES = security_config.get(
+    "refresh_token_expiration_minutes", 7 * 24 * 60
+)
+# bcrypt work factor of new password hashes (each step doubles the cost)
+BCRYPT_ROUNDS = security_config.get("bcrypt_rounds", 12)
+password_hashing_config = security_config.get("password_hashing", {})
+PASSWORD_HASHING_WORKERS = password_hashing_config.get(
+    "workers", min(4, os.cpu_count() or 1)
+)
+PASSWORD_HASHING_QUEUE_SIZE = password_hashing_config.get("queue_size", 16)
+# How often users.yml and groups.yml are checked for changes
+PERMISSIONS_RELOAD_CHECK_SECONDS = security_config.get(
+    "permissions_reload_check_seconds", 1
+)
+# Sign the user's permissions into access tokens, so requests don't need
+# to look them up
+TOKEN_PERMISSIONS_CLAIM = security_config.get("token_permissions_claim", False)
+# What to do with a token whose permissions are from an older config:
+# "refresh" looks up the current permissions, "reject" fails with 401
+STALE_TOKEN_PERMISSIONS = security_config.get(
+    "stale_token_permissions", "refresh"
+)
+# Access tokens whose signature was verified, kept to skip decoding them
+# again (0 disables the cache)
+TOKEN_CACHE_SIZE = security_config.get("token_cache_size", 10000)
+# SQLite file that keeps revoked token IDs across restarts (relative
+# paths are relative to the app directory)
+REVOCATION_DB_PATH = os.path.join(
+    CURRENT_DIR,
+    security_config.get("revocation_db_path", "data/revoked_tokens.db")
+)
 
 def load_jwt_secret_key():
     with open(f"{CURRENT_DIR}/config/secrets.yml", "r") as secrets:
-        return yaml.safe_load(secrets).get("jwt_secret_key")
\ No newline at end of file
+        return yaml.safe_load(secrets).get("jwt_secret_key")
+
+with open(f"{CURRENT_DIR}/config/jobs.yml", "r") as jobs_conf_file:
+    jobs_config = yaml.safe_load(jobs_conf_file) or {}
+
+JOB_WORKERS = jobs_config.get("workers", 8)
+JOB_RETENTION_MINUTES = jobs_config.get("retention_minutes", 60)
+
+with open(f"{CURRENT_DIR}/config/aws.yml", "r") as aws_conf_file:
+    aws_config = yaml.safe_load(aws_conf_file) or {}
+
+AWS_DEFAULT_REGION = aws_config.get("default_region", "us-east-1")
+AWS_REGIONS = aws_config.get("regions") or [AWS_DEFAULT_REGION]
+AWS_REGION_SUBNETS = aws_config.get("subnets") or {}
+
+clients_config = aws_config.get("clients", {})
+AWS_CLIENT_MAX_POOL_CONNECTIONS = clients_config.get("max_pool_connections", 32)
+AWS_CLIENT_RETRY_MODE = clients_config.get("retry_mode", "standard")
+AWS_CLIENT_MAX_ATTEMPTS = clients_config.get("max_attempts", 5)
+AWS_CLIENT_CONNECT_TIMEOUT = clients_config.get("connect_timeout", 5)
+AWS_CLIENT_READ_TIMEOUT = clients_config.get("read_timeout", 30)
+
+executor_config = aws_config.get("executor", {})
+AWS_EXECUTOR_WORKERS = executor_config.get("workers", 32)
+AWS_SERVICE_CONCURRENCY = executor_config.get("service_concurrency", {})
+
+s3_config = aws_config.get("s3", {})
+S3_TAG_SCAN_WORKERS = s3_config.get("tag_scan_workers", 16)
+S3_EMPTY_BUCKET_WORKERS = s3_config.get("empty_bucket_workers", 8)
+# S3 rejects multipart parts smaller than 5 MiB (except for the last one)
+S3_UPLOAD_PART_SIZE = max(s3_config.get("upload_part_size_mb", 8), 5) * 1024 * 1024
+S3_UPLOAD_PART_CONCURRENCY = s3_config.get("upload_part_concurrency", 4)
+S3_PRESIGNED_URL_EXPIRATION_SECONDS = s3_config.get(
+    "presigned_url_expiration_seconds", 3600
+)
+
+inventory_cache_config = aws_config.get("inventory_cache", {})
+INVENTORY_CACHE_TTL_SECONDS = inventory_cache_config.get("ttl_seconds", 60)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from datetime import timedelta, datetime
-from app.authentication import verify_password, generate_access_token
+from app.authentication import generate_access_token, generate_refresh_token
+from app.password_executor import run_verify_password
 from app import users, config
 
 router = APIRouter()
@@ -16,6 +17,8 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str
     expires_at_utc: datetime
+    refresh_token: str
+    refresh_expires_at_utc: datetime
     user_permissions: dict
 
 
@@ -31,16 +34,21 @@ async def login(login_req: LoginRequest):
                 detail="Username does not exist."
             )
 
-        if not verify_password(login_req.password, user["password_hash"]):
+        if not await run_verify_password(
+            login_req.password, user["password_hash"]
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password"
             )
         token = generate_access_token(username)
+        refresh_token = generate_refresh_token(username)
         return {
             "access_token": token.get("token"),
             "token_type": "bearer",
             "expires_at_utc": token.get("expires_at_utc"),
+            "refresh_token": refresh_token.get("token"),
+            "refresh_expires_at_utc": refresh_token.get("expires_at_utc"),
             "user_permissions": users.get_user_permissions(username).model_dump()
         }
 
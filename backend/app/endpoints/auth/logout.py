@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from typing import Optional
+from app.authentication import (
+    optional_oauth2_scheme,
+    authenticate_token,
+    decode_refresh_token,
+    revoke_refresh_token_family
+)
+from app.token_cache import verified_tokens
+from app.token_revocation import revoked_tokens
+
+router = APIRouter()
+
+
+class LogoutRequest(BaseModel):
+    # Also revoke the session's refresh tokens
+    refresh_token: Optional[str] = None
+
+
+@router.post("/auth/logout")
+def logout(
+    logout_req: Optional[LogoutRequest] = None,
+    token: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """
+    Revoke the access token of the request, so it can't be used again even
+    before it expires. With the session's refresh token, every refresh
+    token issued from the same login is revoked too. The refresh token
+    alone is enough, so a session can be revoked after its access token
+    expired.
+    """
+    refresh_token = logout_req.refresh_token if logout_req else None
+    claims = principal = None
+    if token:
+        try:
+            claims, principal = authenticate_token(token)
+        except HTTPException:
+            # An expired access token doesn't need to be revoked
+            if not refresh_token:
+                raise
+    if claims is None and not refresh_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+
+    refresh_claims = None
+    if refresh_token:
+        refresh_claims = decode_refresh_token(refresh_token)
+        if principal and refresh_claims["username"] != principal.username:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The refresh token belongs to another user"
+            )
+    if claims and not claims.get("jti") and not refresh_claims:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This token can't be revoked, it will expire on its own"
+        )
+
+    if refresh_claims:
+        revoke_refresh_token_family(refresh_claims)
+    if claims and claims.get("jti"):
+        revoked_tokens.revoke(claims["jti"], claims["exp"])
+        verified_tokens.discard(verified_tokens.key(token))
+    username = principal.username if principal else refresh_claims["username"]
+    return {"username": username, "status": "logged out"}
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel
+from datetime import datetime
+from app.authentication import (
+    decode_refresh_token,
+    generate_access_token,
+    generate_refresh_token,
+    revoke_refresh_token_family
+)
+from app.refresh_tokens import refresh_token_rotation
+from app import users
+
+router = APIRouter()
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    token_type: str
+    expires_at_utc: datetime
+    refresh_token: str
+    refresh_expires_at_utc: datetime
+    user_permissions: dict
+
+
+@router.post("/auth/refresh", response_model=RefreshResponse)
+async def refresh(refresh_req: RefreshRequest):
+    """
+    Exchange a refresh token for a new access token and a new refresh
+    token. Only the token's signature is checked, so this is much cheaper
+    than a login. Each refresh token can be used once: using one twice
+    revokes every token refreshed from the same login.
+    """
+    claims = decode_refresh_token(refresh_req.refresh_token)
+    username = claims["username"]
+    if not users.get_user(username):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Username does not exist."
+        )
+    if not refresh_token_rotation.use(
+        claims["jti"], claims["family"], claims["exp"]
+    ):
+        revoke_refresh_token_family(claims)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token was already used. Please log in again."
+        )
+
+    token = generate_access_token(username)
+    refresh_token = generate_refresh_token(username, claims["family"])
+    return {
+        "access_token": token.get("token"),
+        "token_type": "bearer",
+        "expires_at_utc": token.get("expires_at_utc"),
+        "refresh_token": refresh_token.get("token"),
+        "refresh_expires_at_utc": refresh_token.get("expires_at_utc"),
+        "user_permissions": users.get_user_permissions(username).model_dump()
+    }
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from app.authentication import get_username_from_token
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.authentication import get_username_from_token, Principal
 from app import cloud_api
-from app import users
+from app import jobs
+from app.endpoints.ec2.helper_functions import get_user_instances
+from app.instance_reservations import instance_reservations
 
 router = APIRouter()
 
@@ -11,61 +14,98 @@ class EC2CreateRequest(BaseModel):
     name: str
     instance_type: str
     ami: str
+    region: Optional[str] = None
+    # Number of instances to launch in one batch
+    count: int = Field(1, ge=1)
 
 
-class EC2CreateResponse(BaseModel):
-    instance_id: str
-    instance_public_ip: str
-    message: str
+# Instances in these states count against ec2_max_running
+QUOTA_INSTANCE_STATES = ("pending", "running")
 
-def get_running_instances_amount(user: str) -> int:
-    instances = cloud_api.get_ec2_instances_by_user(user, state="running")
-    return len(instances)
 
-@router.post("/ec2/create", response_model=EC2CreateResponse, tags=["ec2"])
+async def get_running_instances_amount(user: str) -> int:
+    # Read from AWS, not from the cache, so the quota check is current
+    instances = await get_user_instances(user, refresh=True)
+    return sum(
+        instance["state"] in QUOTA_INSTANCE_STATES for instance in instances
+    )
+
+
+def launch_reserved_instances(user: str, count: int, **launch_args) -> dict:
+    """
+    Job body of /ec2/create: launch the batch, and release its quota
+    reservation once the instances are in the inventory, or if the launch
+    failed
+    """
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            instance_reservations.release(user, count)
+
+    try:
+        return cloud_api.launch_ec2_instance(
+            user=user, count=count, on_launched=release, **launch_args
+        )
+    finally:
+        release()
+
+@router.post(
+    "/ec2/create",
+    response_model=jobs.JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["ec2"]
+)
 async def ec2_create_endpoint(request: EC2CreateRequest,
-                        username: str = Depends(get_username_from_token)):
+                        username: Principal = Depends(get_username_from_token)):
     #Verify the requested instance type and AMI are allowed
     try:
-        permissions = users.get_user_permissions(username)
+        region = cloud_api.resolve_region(request.region)
+        permissions = username.permissions
         if request.instance_type not in permissions.ec2_instance_types:
             raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Instance type permission denied."
             )
-        if (request.ami not in permissions.ami_choice.keys()
-            and request.ami not in permissions.ami_choice.values()
-        ):
+        if not permissions.allows_ami(request.ami):
             raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="AMI choice permission denied."
             )
 
-        # Verify the user doesn't exceed the maximum running instances allowed
-        print(get_running_instances_amount(username))
-        print(permissions.ec2_max_running)
-        if (
-            get_running_instances_amount(username)
-            >= permissions.ec2_max_running
-        ):
-            raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Your request exceeds the maximum number"
-                     " of running instances allowed for the user."
-            )
+        # Verify the whole batch doesn't exceed the maximum running
+        # instances allowed for the user. The batch is reserved before
+        # counting, so concurrent requests see each other's batches, and
+        # batches still waiting to launch are counted too.
+        reserved = instance_reservations.reserve(username, request.count)
+        try:
+            if (
+                await get_running_instances_amount(username) + reserved
+                > permissions.ec2_max_running
+            ):
+                raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Your request exceeds the maximum number"
+                         " of running instances allowed for the user."
+                )
 
-        # Launch the instance
-        if request.ami in permissions.ami_choice.keys():
-            ami = permissions.ami_choice[request.ami]
-        else:
-            ami = request.ami
-        cloud_api_response = cloud_api.launch_ec2_instance(name=request.name,
-                                            instance_type=request.instance_type,
-                                            ami=ami, user=username)
-        instance_id = cloud_api_response["instance_id"]
-        public_ip = cloud_api_response["public_ip"]
-        return {"instance_id": instance_id, "instance_public_ip": public_ip,
-                "message": "message"}
+            # Launch the instances in the background
+            if request.ami in permissions.ami_choice.keys():
+                ami = permissions.ami_choice[request.ami]
+            else:
+                ami = request.ami
+            job = jobs.submit_job(
+                username, "ec2_create", launch_reserved_instances,
+                user=username, count=request.count,
+                name=request.name, instance_type=request.instance_type,
+                ami=ami, region=region
+            )
+        except BaseException:
+            instance_reservations.release(username, request.count)
+            raise
+        return jobs.accepted_response(job)
 
     except Exception as e:
         if not isinstance(e, HTTPException):
@@ -1,36 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.authentication import get_username_from_token
-from app import cloud_api
+from app import jobs
 from pydantic import BaseModel
-from app.endpoints.ec2.helper_functions import verify_instance_and_return_id
-
+from typing import Optional
+from app.endpoints.ec2.helper_functions import (
+    resolve_user_instances, run_instances_state_change
+)
 
 router = APIRouter()
 
-class DeleteInstanceRequest(BaseModel):
-    instance: str
-
-class DeleteInstanceResponse(BaseModel):
-    instance_id: str
-    status: str
+class DeleteInstancesRequest(BaseModel):
+    # Names or IDs of the instances. "instance" is still accepted for a
+    # single one.
+    instances: list[str] = []
+    instance: Optional[str] = None
 
 @router.delete(
-        "/ec2/delete", response_model=DeleteInstanceResponse, tags=["ec2"]
+    "/ec2/delete",
+    response_model=jobs.JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["ec2"]
 )
 async def ec2_delete_endpoint(
-    request: DeleteInstanceRequest,
+    request: DeleteInstancesRequest,
     username: str = Depends(get_username_from_token)
 ):
-    instance_id = verify_instance_and_return_id(username, request.instance)
-    if not instance_id:
+    requested = request.instances + (
+        [request.instance] if request.instance else []
+    )
+    if not requested:
+        raise HTTPException(
+            status_code=400,
+            detail="No instances were specified"
+        )
+
+    instances, skipped = await resolve_user_instances(
+        username, requested
+    )
+    if not instances:
         raise HTTPException(
             status_code=404,
-            detail="Instance not found"
+            detail="Instance(s) not found"
         )
     
-    try:
-        return cloud_api.terminate_ec2_instance(
-                    instance_id=instance_id, user=username
-                )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    job = jobs.submit_job(
+        username, "ec2_delete", run_instances_state_change,
+        "terminate", instances, skipped, username
+    )
+    return jobs.accepted_response(job)
@@ -1,15 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from app.authentication import get_username_from_token
 from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.inventory import inventory_cache, EC2_INSTANCES
+from app.endpoints.ec2.helper_functions import get_user_instances
 from pydantic import BaseModel
+from typing import AsyncIterator, Optional
+import json
 
 
 router = APIRouter()
 
+
+def filter_instances(
+    instances: list[dict],
+    state: str = None,
+    name_prefix: str = None,
+    region: str = None
+) -> list[dict]:
+    return [
+        instance for instance in instances
+        if (not state or instance["state"] == state)
+        and (not name_prefix or instance["name"].startswith(name_prefix))
+        and (not region or instance["region"] == region)
+    ]
+
+
+async def stream_instances(
+    username: str,
+    state: str = None,
+    name_prefix: str = None,
+    limit: int = None,
+    refresh: bool = False,
+    region: str = None
+) -> AsyncIterator[str]:
+    """
+    Yield the user's instances as NDJSON lines, in the order they're read.
+    Served from the inventory cache when it's fresh, otherwise streamed
+    from AWS page by page.
+    """
+    cached = None if refresh else inventory_cache.peek(username, EC2_INSTANCES)
+    if cached is not None:
+        instances = filter_instances(cached, state, name_prefix, region)
+        for instance in instances[:limit]:
+            yield json.dumps(instance) + "\n"
+        return
+
+    pages = cloud_api.iter_ec2_instance_pages(
+        username, state, name_prefix, regions=[region] if region else None
+    )
+    sent = 0
+    try:
+        while limit is None or sent < limit:
+            page = await run_cloud_call("ec2", next, pages, None)
+            if page is None:
+                break
+            for instance in page:
+                if limit is not None and sent >= limit:
+                    break
+                yield json.dumps(instance) + "\n"
+                sent += 1
+    except Exception as e:
+        # The response status was already sent, so report the error inline
+        yield json.dumps({"error": str(e)}) + "\n"
+    finally:
+        # Stop reading the regions when the limit is reached or the client
+        # went away, in the thread pool as it waits for the region threads
+        try:
+            await run_cloud_call("ec2", pages.close)
+        except ValueError:
+            # A disconnect interrupted a read that's still running: the
+            # generator is closed when it's garbage collected
+            pass
+
+
 @router.get("/ec2/list", tags=["ec2"])
-async def ec2_list_endpoint(username: str = Depends(get_username_from_token)):
+async def ec2_list_endpoint(
+    state: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    region: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    refresh: bool = False,
+    username: str = Depends(get_username_from_token)
+):
+    """
+    List the user's instances in all regions, optionally filtered by state,
+    name prefix and region.
+    With a limit or a cursor, instances are returned in pages ordered by
+    instance ID, and next_cursor is set when there are more of them.
+    With stream=true, instances are sent as NDJSON as soon as they're read,
+    in no particular order, so they can't be paged: stream=true doesn't
+    take a cursor.
+    """
+    if region:
+        cloud_api.resolve_region(region)
+    if stream:
+        if cursor:
+            raise HTTPException(
+                status_code=400,
+                detail="A cursor can't be used with stream=true, "
+                "page with limit and cursor instead"
+            )
+        return StreamingResponse(
+            stream_instances(
+                username, state, name_prefix, limit, refresh, region
+            ),
+            media_type="application/x-ndjson"
+        )
+
     try:
-        instances = cloud_api.get_ec2_instances_by_user(username)
-        return {"instances": instances}
+        instances = await get_user_instances(username, refresh=refresh)
+        instances = filter_instances(instances, state, name_prefix, region)
+        next_cursor = None
+        if limit or cursor:
+            instances = sorted(instances, key=lambda i: i["instance_id"])
+            if cursor:
+                instances = [
+                    instance for instance in instances
+                    if instance["instance_id"] > cursor
+                ]
+            if limit and len(instances) > limit:
+                instances = instances[:limit]
+                next_cursor = instances[-1]["instance_id"]
+        return {"instances": instances, "next_cursor": next_cursor}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,38 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.authentication import get_username_from_token
-from app import cloud_api
+from app import jobs
 from pydantic import BaseModel
-from app.endpoints.ec2.helper_functions import verify_instance_and_return_id
+from typing import Optional
+from app.endpoints.ec2.helper_functions import (
+    resolve_user_instances, run_instances_state_change
+)
 
 router = APIRouter()
 
-class StopInstanceRequest(BaseModel):
-    instance: str
+class StopInstancesRequest(BaseModel):
+    # Names or IDs of the instances. "instance" is still accepted for a
+    # single one.
+    instances: list[str] = []
+    instance: Optional[str] = None
 
-@router.post("/ec2/stop", tags=["ec2"])
+@router.post(
+    "/ec2/stop",
+    response_model=jobs.JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["ec2"]
+)
 async def ec2_stop_endpoint(
-    request: StopInstanceRequest,
+    request: StopInstancesRequest,
     username: str = Depends(get_username_from_token)
 ):
-    instance_id = verify_instance_and_return_id(
-        user=username,
-        instance=request.instance,
-        state="running"
+    requested = request.instances + (
+        [request.instance] if request.instance else []
     )
-    if not instance_id:
+    if not requested:
+        raise HTTPException(
+            status_code=400,
+            detail="No instances were specified"
+        )
+
+    instances, skipped = await resolve_user_instances(
+        username, requested, state="running"
+    )
+    if not instances:
         raise HTTPException(
             status_code=404,
-            detail="Instance not found, or is not in a running state "
+            detail="Instance(s) not found, or not in a running state "
             "(Note: you can only start and stop instances that you own "
             "and that are managed by ResourSphere)"
         )
     
-    try:
-        return cloud_api.stop_ec2_instance(instance_id)
-    except Exception as e:
-        if not isinstance(e, HTTPException):
-            raise HTTPException(status_code=500, detail=str(e))
-        else:
-            raise e
-        
-        
+    job = jobs.submit_job(
+        username, "ec2_stop", run_instances_state_change,
+        "stop", instances, skipped, username
+    )
+    return jobs.accepted_response(job)
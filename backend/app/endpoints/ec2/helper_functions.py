@@ -1,17 +1,63 @@
-from fastapi import HTTPException
 from app import cloud_api
+from app.inventory import get_inventory, EC2_INSTANCES
 
 
-def verify_instance_and_return_id(user: str, instance: str, state=None) -> str:
-    user_instances = cloud_api.get_ec2_instances_by_user(user, state)
-    instances = {
-        instance["name"]: instance["instance_id"]
-        for instance in user_instances
-    }
-    instance_id = (
-        instances.get(instance)
-        if instance in instances.keys()
-        else instance if instance in instances.values()
-        else ""
+async def get_user_instances(
+    user: str, state: str = None, refresh: bool = False
+) -> list[dict]:
+    instances = await get_inventory(
+        user, EC2_INSTANCES,
+        lambda: cloud_api.get_ec2_instances_by_user(user),
+        refresh=refresh
     )
-    return instance_id
\ No newline at end of file
+    if state:
+        return [instance for instance in instances if instance["state"] == state]
+    return instances
+
+
+async def resolve_user_instances(
+    user: str, instances: list[str], state: str = None
+) -> tuple[list[dict], list[dict]]:
+    """
+    Find the user's instances by name or ID, with a single inventory lookup.
+    Returns the instances found (in the requested state, if given), and a
+    result entry for each requested instance that was skipped.
+    """
+    user_instances = await get_user_instances(user)
+    instances_by_name = {
+        user_instance["name"]: user_instance for user_instance in user_instances
+    }
+    instances_by_id = {
+        user_instance["instance_id"]: user_instance
+        for user_instance in user_instances
+    }
+
+    found, skipped = [], []
+    found_ids = set()
+    for instance in instances:
+        user_instance = (
+            instances_by_name.get(instance) or instances_by_id.get(instance)
+        )
+        if not user_instance:
+            skipped.append({"instance": instance, "status": "not found"})
+        elif state and user_instance["state"] != state:
+            skipped.append({
+                "instance": instance,
+                "instance_id": user_instance["instance_id"],
+                "region": user_instance["region"],
+                "status": f"skipped (instance is {user_instance['state']})"
+            })
+        elif user_instance["instance_id"] not in found_ids:
+            found_ids.add(user_instance["instance_id"])
+            found.append(user_instance)
+    return found, skipped
+
+
+def run_instances_state_change(
+    action: str, instances: list[dict], skipped: list[dict], user: str
+) -> dict:
+    """Job body for the bulk start/stop/delete endpoints."""
+    result = cloud_api.change_ec2_instances_state(action, instances, user)
+    result["instances"].extend(skipped)
+    result["failed"] += len(skipped)
+    return result
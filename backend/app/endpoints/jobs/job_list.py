@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from app.authentication import get_username_from_token
+from app import jobs
+from pydantic import BaseModel
+from typing import List
+
+router = APIRouter()
+
+
+class JobListResponse(BaseModel):
+    jobs: List[jobs.Job]
+
+
+@router.get("/jobs", response_model=JobListResponse, tags=["jobs"])
+async def job_list_endpoint(username: str = Depends(get_username_from_token)):
+    """
+    List the background jobs submitted by the authenticated user
+    """
+    return {"jobs": jobs.list_jobs(username)}
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from app.authentication import get_username_from_token
+from app import jobs
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=jobs.Job, tags=["jobs"])
+async def job_status_endpoint(
+    job_id: str,
+    username: str = Depends(get_username_from_token)
+):
+    """
+    Get the status, progress and result of a background job
+    """
+    return jobs.get_job(job_id, username)
@@ -1,19 +1,72 @@
-from app.cloud_api import get_dns_zones_list
+from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from app.cloud_api import get_dns_zone_index, normalize_zone_name
+from app.inventory import get_inventory, DNS_ZONES
 
-def get_zone_id_if_owned_by_user(zone: str, user: str) -> str:
+
+async def get_user_zone_index(user: str, refresh: bool = False) -> dict:
+    return await get_inventory(
+        user, DNS_ZONES, lambda: get_dns_zone_index(user), refresh=refresh
+    )
+
+async def get_zone_id_if_owned_by_user(zone: str, user: str) -> str:
     """
     Validate zone ownership and return the zone ID
     """
-    # Get all zones for the user
-    user_zones = get_dns_zones_list(user)
-    zones_dict = {zone['zone_id']: zone['name'] for zone in user_zones}
-
-    zone_id = (
-        zone if zone in zones_dict.keys()
-        else next(
-            (z_id for z_id, z_name in zones_dict.items() if z_name == zone),
-            ""
-        )
-    )
-    return zone_id
-    
\ No newline at end of file
+    # The user's zones, indexed by ID and by name
+    zone_index = await get_user_zone_index(user)
+
+    if zone in zone_index["by_id"]:
+        return zone
+    return zone_index["by_name"].get(normalize_zone_name(zone), "")
+
+async def get_zone_name(zone_id: str, user: str) -> str:
+    zone_index = await get_user_zone_index(user)
+    return normalize_zone_name(zone_index["by_id"][zone_id])
+
+
+class AliasTarget(BaseModel):
+    hosted_zone_id: str
+    dns_name: str
+    evaluate_target_health: bool = False
+
+class DnsRecord(BaseModel):
+    """
+    A record set: every value of a name and type. Names are relative to the
+    zone unless they end with a dot or with the zone name, "@" is the zone
+    apex.
+    """
+    name: str
+    type: str
+    ttl: Optional[int] = Field(None, ge=0)
+    values: list[str] = []
+    alias: Optional[AliasTarget] = None
+
+    @model_validator(mode="after")
+    def check_values_or_alias(self):
+        if bool(self.values) == bool(self.alias):
+            raise ValueError(
+                f"Record {self.name} {self.type} needs either values "
+                "or an alias"
+            )
+        return self
+
+def qualify_record_name(name: str, zone_name: str) -> str:
+    """Return the fully qualified name, with a trailing dot"""
+    name = name.lower()
+    if name in ("@", "", zone_name, zone_name.rstrip(".")):
+        return zone_name
+    if name.endswith("."):
+        return name
+    if name.endswith(f".{zone_name.rstrip('.')}"):
+        return f"{name}."
+    return f"{name}.{zone_name}"
+
+def qualify_records(records: list[DnsRecord], zone_name: str) -> list[dict]:
+    return [
+        {
+            **record.model_dump(exclude_none=True),
+            "name": qualify_record_name(record.name, zone_name)
+        }
+        for record in records
+    ]
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
+from pydantic import BaseModel
+from app.authentication import get_username_from_token
+from app.cloud_api import change_dns_records
+from app.cloud_executor import run_cloud_call
+from app.endpoints.route53.helper_functions import (
+    get_zone_id_if_owned_by_user,
+    get_zone_name,
+    qualify_records,
+    DnsRecord
+)
+
+router = APIRouter()
+
+
+class RecordChangeRequest(BaseModel):
+    records: list[DnsRecord]
+
+
+@router.post("/route53/zone/{zone}/records/{action}", tags=["route53"])
+async def dns_records_change_endpoint(
+    zone: str,
+    action: Literal["create", "upsert", "delete"],
+    request: RecordChangeRequest,
+    user: str = Depends(get_username_from_token)
+):
+    """
+    Create, upsert or delete many records in a DNS zone at once. The
+    changes are packed into the fewest change batches Route53 accepts,
+    instead of one call per record. Deleted records must match the
+    existing ones exactly (TTL and values).
+    """
+    zone_id = await get_zone_id_if_owned_by_user(zone, user)
+    if not zone_id:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Zone {zone} does not exist or is not owned by user {user}"
+        )
+    if not request.records:
+        raise HTTPException(status_code=400, detail="No records given")
+    zone_name = await get_zone_name(zone_id, user)
+    records = qualify_records(request.records, zone_name)
+    try:
+        return await run_cloud_call(
+            "route53", change_dns_records, zone_id, action, records
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error changing DNS records: {str(e)}"
+        )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.authentication import get_username_from_token
 from app.cloud_api import create_dns_zone
+from app.cloud_executor import run_cloud_call
 from pydantic import BaseModel
 # import uuid
 
@@ -25,7 +26,9 @@ async def dns_zone_create_endpoint(
     Create a new DNS zone in Route53
     """
     try:
-        result = create_dns_zone(request.zone_name, user)
+        result = await run_cloud_call(
+            "route53", create_dns_zone, request.zone_name, user
+        )
         return result
     except Exception as e:
         if isinstance(e, HTTPException):
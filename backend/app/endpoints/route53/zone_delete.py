@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from app.authentication import get_username_from_token
 from app.cloud_api import delete_dns_zone
+from app.cloud_executor import run_cloud_call
+from app import jobs
 from app.endpoints.route53.helper_functions import (
     get_zone_id_if_owned_by_user
 )
@@ -13,19 +15,30 @@ router = APIRouter()
 @router.delete("/route53/zone/{zone}/delete", tags=["route53"])
 async def dns_zone_delete_endpoint(
     zone: str,
+    response: Response,
+    force: bool = False,
     user: str = Depends(get_username_from_token)
 ):
     """
-    Delete a DNS zone in Route53
+    Delete a DNS zone in Route53. Route53 only deletes zones that have no
+    records besides the apex SOA and NS. With force, the other records are
+    deleted first, in a background job (202) that reports its progress.
     """
-    zone_id = get_zone_id_if_owned_by_user(zone, user)
+    zone_id = await get_zone_id_if_owned_by_user(zone, user)
     if not zone_id:
         raise HTTPException(
             status_code=404,
             detail=f"Zone {zone} does not exist or is not owned by user {user}"
         )
+    if force:
+        job = jobs.submit_job(
+            user, "route53_zone_delete", delete_dns_zone,
+            zone_id=zone_id, user=user, force=True
+        )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return jobs.accepted_response(job)
     try:
-        delete_dns_zone(zone_id)
+        await run_cloud_call("route53", delete_dns_zone, zone_id, user)
         return {
             "zone_id": zone_id,
             "status": "deleted"
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.authentication import get_username_from_token
-from app.cloud_api import get_dns_zones_list
+from app.endpoints.route53.helper_functions import get_user_zone_index
 from typing import List, Dict, Any
 from pydantic import BaseModel
 
@@ -17,7 +17,10 @@ router = APIRouter()
     description="Returns a list of DNS zones owned by the authenticated user",
     response_model=ZoneListResponse
 )
-async def list_dns_zones(username: str = Depends(get_username_from_token)) -> Dict[str, List[Dict[str, Any]]]:
+async def list_dns_zones(
+    refresh: bool = False,
+    username: str = Depends(get_username_from_token)
+) -> Dict[str, List[Dict[str, Any]]]:
     """
     List all DNS zones owned by the authenticated user.
     
@@ -25,8 +28,8 @@ async def list_dns_zones(username: str = Depends(get_username_from_token)) -> Di
         Dict containing a list of DNS zones with their details
     """
     try:
-        zones = get_dns_zones_list(username)
-        return {"zones": zones}
+        zone_index = await get_user_zone_index(username, refresh=refresh)
+        return {"zones": zone_index["zones"]}
     except Exception as e:
         if not isinstance(e, HTTPException):
             raise HTTPException(
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from app.authentication import get_username_from_token
+from app.cloud_api import sync_dns_records
+from app.cloud_executor import run_cloud_call
+from app.endpoints.route53.helper_functions import (
+    get_zone_id_if_owned_by_user,
+    get_zone_name,
+    qualify_records,
+    DnsRecord
+)
+
+router = APIRouter()
+
+
+class ZoneSyncRequest(BaseModel):
+    records: list[DnsRecord]
+    dry_run: bool = False
+
+
+@router.post("/route53/zone/{zone}/sync", tags=["route53"])
+async def dns_zone_sync_endpoint(
+    zone: str,
+    request: ZoneSyncRequest,
+    user: str = Depends(get_username_from_token)
+):
+    """
+    Make the zone's records match the given ones: records that are missing
+    are created, different ones are upserted and the others are deleted.
+    The apex SOA and NS records, and records with a routing policy, are
+    left alone. With dry_run, the changes are returned without being
+    applied.
+    """
+    zone_id = await get_zone_id_if_owned_by_user(zone, user)
+    if not zone_id:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Zone {zone} does not exist or is not owned by user {user}"
+        )
+    zone_name = await get_zone_name(zone_id, user)
+    records = qualify_records(request.records, zone_name)
+    try:
+        return await run_cloud_call(
+            "route53", sync_dns_records,
+            zone_id, zone_name, records, request.dry_run
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error syncing DNS zone: {str(e)}"
+        )
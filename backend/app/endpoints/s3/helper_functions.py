@@ -0,0 +1,28 @@
+from fastapi import HTTPException
+from app.cloud_api import get_s3_buckets
+from app.inventory import get_inventory, S3_BUCKETS
+
+
+async def get_user_buckets(user: str, refresh: bool = False) -> list[dict]:
+    return await get_inventory(
+        user, S3_BUCKETS, lambda: get_s3_buckets(user), refresh=refresh
+    )
+
+
+async def is_bucket_owned_by_user(bucket_name: str, user: str) -> bool:
+    user_buckets = await get_user_buckets(user)
+    return bucket_name in {bucket['name'] for bucket in user_buckets}
+
+
+async def verify_bucket_owned_by_user(bucket_name: str, user: str):
+    """Raise 404 unless the bucket exists and is owned by the user."""
+    if not await is_bucket_owned_by_user(bucket_name, user):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Bucket {bucket_name} does not exist, or is not "
+            f"owned by user {user}."
+        )
+
+
+# Lowercase hex MD5 digest of a file's content
+MD5_PATTERN = r"^[0-9a-f]{32}$"
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from app.authentication import get_username_from_token
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import verify_bucket_owned_by_user
+
+
+router = APIRouter()
+
+
+class AbortUploadRequest(BaseModel):
+    bucket_name: str
+    file_name: str
+    upload_id: str
+
+
+@router.post("/s3/presign/abort", tags=["s3"])
+async def presign_abort_endpoint(
+    request: AbortUploadRequest,
+    username: str = Depends(get_username_from_token)
+):
+    """Abort a multipart upload started with /s3/presign/upload"""
+    await verify_bucket_owned_by_user(request.bucket_name, username)
+    return await run_cloud_call(
+        "s3", cloud_api.abort_s3_multipart_upload,
+        request.bucket_name, request.file_name, request.upload_id
+    )
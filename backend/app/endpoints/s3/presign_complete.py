@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from app.authentication import get_username_from_token
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import verify_bucket_owned_by_user
+
+
+router = APIRouter()
+
+
+class UploadedPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    bucket_name: str
+    file_name: str
+    upload_id: str
+    parts: list[UploadedPart]
+
+
+@router.post("/s3/presign/complete", tags=["s3"])
+async def presign_complete_endpoint(
+    request: CompleteUploadRequest,
+    username: str = Depends(get_username_from_token)
+):
+    """Complete a multipart upload started with /s3/presign/upload"""
+    await verify_bucket_owned_by_user(request.bucket_name, username)
+    return await run_cloud_call(
+        "s3", cloud_api.complete_s3_multipart_upload,
+        request.bucket_name, request.file_name, request.upload_id,
+        [
+            {'PartNumber': part.part_number, 'ETag': part.etag}
+            for part in request.parts
+        ]
+    )
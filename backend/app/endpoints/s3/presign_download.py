@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from app.authentication import get_username_from_token
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import verify_bucket_owned_by_user
+
+
+router = APIRouter()
+
+
+@router.get("/s3/presign/download", tags=["s3"])
+async def presign_download_endpoint(
+    bucket_name: str,
+    file_name: str,
+    username: str = Depends(get_username_from_token)
+):
+    """Return a presigned URL to download a file directly from S3"""
+    await verify_bucket_owned_by_user(bucket_name, username)
+    url = await run_cloud_call(
+        "s3", cloud_api.generate_s3_download_url, bucket_name, file_name
+    )
+    return {
+        "bucket_name": bucket_name,
+        "file_name": file_name,
+        "url": url,
+        "expires_in": cloud_api.S3_PRESIGNED_URL_EXPIRATION
+    }
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+import math
+from app.authentication import get_username_from_token
+from app import cloud_api, config
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import (
+    verify_bucket_owned_by_user, MD5_PATTERN
+)
+
+
+router = APIRouter()
+
+# S3 allows at most 10,000 parts per multipart upload
+MAX_MULTIPART_PARTS = 10000
+
+
+class PresignUploadRequest(BaseModel):
+    bucket_name: str
+    file_name: str
+    method: Literal["put", "post", "multipart"] = "put"
+    # Size of the file in bytes, required to split a multipart upload
+    size: Optional[int] = Field(None, ge=0)
+    # MD5 of the file. If the object already has this content, no URLs are
+    # returned and the upload can be skipped.
+    md5: Optional[str] = Field(None, pattern=MD5_PATTERN)
+
+
+def get_part_size(size: int) -> int:
+    """The configured part size, or larger if the file needs too many parts"""
+    part_size = config.S3_UPLOAD_PART_SIZE
+    if size > part_size * MAX_MULTIPART_PARTS:
+        mib = 1024 * 1024
+        part_size = math.ceil(size / MAX_MULTIPART_PARTS / mib) * mib
+    return part_size
+
+
+@router.post("/s3/presign/upload", tags=["s3"])
+async def presign_upload_endpoint(
+    request: PresignUploadRequest,
+    username: str = Depends(get_username_from_token)
+):
+    """
+    Return presigned URLs to upload a file directly to S3, as a single PUT,
+    a form POST, or a multipart upload (one URL per part). Multipart uploads
+    are finished with /s3/presign/complete, or cancelled with
+    /s3/presign/abort.
+    The status is "unchanged" when the object already has the file's
+    content (by MD5), and "pending" otherwise.
+    """
+    await verify_bucket_owned_by_user(request.bucket_name, username)
+    response = {
+        "bucket_name": request.bucket_name,
+        "file_name": request.file_name,
+        "method": request.method,
+        "status": "pending",
+        "expires_in": cloud_api.S3_PRESIGNED_URL_EXPIRATION
+    }
+    if request.md5 and await run_cloud_call(
+        "s3", cloud_api.find_unchanged_s3_object,
+        request.bucket_name, request.file_name, request.md5
+    ):
+        response["status"] = "unchanged"
+        return response
+
+    if request.method == "put":
+        response["url"] = await run_cloud_call(
+            "s3", cloud_api.generate_s3_upload_url,
+            request.bucket_name, request.file_name, request.md5
+        )
+        # Headers the PUT must send, as they are part of the signature
+        response["headers"] = {}
+        if request.md5:
+            response["headers"][
+                f"x-amz-meta-{cloud_api.S3_MD5_METADATA_KEY}"
+            ] = request.md5
+    elif request.method == "post":
+        post = await run_cloud_call(
+            "s3", cloud_api.generate_s3_upload_post,
+            request.bucket_name, request.file_name, request.md5
+        )
+        response["url"] = post["url"]
+        response["fields"] = post["fields"]
+    else:
+        if request.size is None:
+            raise HTTPException(
+                status_code=400,
+                detail="The file size is required for a multipart upload"
+            )
+        part_size = get_part_size(request.size)
+        part_count = max(1, math.ceil(request.size / part_size))
+        upload_id = await run_cloud_call(
+            "s3", cloud_api.create_s3_multipart_upload,
+            request.bucket_name, request.file_name, request.md5
+        )
+        response["upload_id"] = upload_id
+        response["part_size"] = part_size
+        response["parts"] = await run_cloud_call(
+            "s3", cloud_api.generate_s3_upload_part_urls,
+            request.bucket_name, request.file_name, upload_id, part_count
+        )
+    return response
@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.authentication import get_username_from_token
-from app.cloud_api import create_s3_bucket, get_s3_buckets
+from app.cloud_api import create_s3_bucket, resolve_region
+from app import jobs
+from app.endpoints.s3.helper_functions import is_bucket_owned_by_user
 from pydantic import BaseModel
+from typing import Optional
 
 router = APIRouter()
 
 class S3CreateRequest(BaseModel):
     bucket_name: str
     public_access: bool = False
+    region: Optional[str] = None
 
-class S3CreateResponse(BaseModel):
-    bucket_name: str
-    status: str
-    bucket_url: str
-
-@router.post("/s3/create", response_model=S3CreateResponse, tags=["s3"])
+@router.post(
+    "/s3/create",
+    response_model=jobs.JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["s3"]
+)
 async def create_bucket(
     request: S3CreateRequest, username: str = Depends(get_username_from_token)
 ):
@@ -22,15 +26,17 @@ async def create_bucket(
     Create a new S3 bucket
     """
     #check if the bucket already exists
-    buckets = get_s3_buckets(username)
-    if request.bucket_name in [bucket['name'] for bucket in buckets]:
+    region = resolve_region(request.region)
+    if await is_bucket_owned_by_user(request.bucket_name, username):
         raise HTTPException(
             status_code=409,
             detail=f"Bucket {request.bucket_name} already exists"
         )
-    result = create_s3_bucket(
+    job = jobs.submit_job(
+        username, "s3_create", create_s3_bucket,
         name=request.bucket_name,
         user=username,
-        public=request.public_access
+        public=request.public_access,
+        region=region
     )
-    return result
+    return jobs.accepted_response(job)
@@ -1,42 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, status
 from app.authentication import get_username_from_token
-from app.cloud_api import delete_s3_bucket, get_s3_buckets
+from app.cloud_api import delete_s3_bucket
+from app import jobs
+from app.endpoints.s3.helper_functions import is_bucket_owned_by_user
 from pydantic import BaseModel
 
 
 class DeleteBucketRequest(BaseModel):
     bucket_name: str
-
-class DeleteBucketResponse(BaseModel):
-    bucket_name: str
-    status: str
+    # Delete all the objects in the bucket first
+    force: bool = False
 
 router = APIRouter()
 
-@router.delete("/s3/delete", response_model=DeleteBucketResponse, tags=["s3"])
+@router.delete(
+    "/s3/delete",
+    response_model=jobs.JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["s3"]
+)
 async def s3_delete(
     request: DeleteBucketRequest,
     user: str = Depends(get_username_from_token)
 ):
     """
-    Endpoint to delete an S3 bucket.
+    Endpoint to delete an S3 bucket. S3 only deletes empty buckets, unless
+    force is set to delete its objects (and all their versions) first.
     """
-    user_buckets = get_s3_buckets(user)
-    if request.bucket_name not in [bucket['name'] for bucket in user_buckets]:
+    if not await is_bucket_owned_by_user(request.bucket_name, user):
         raise HTTPException(
             status_code=404,
             detail=f"Bucket {request.bucket_name} not found, or is "
             f"not owned by user {user}."
         )
-    try:
-        result = delete_s3_bucket(request.bucket_name)
-        return result
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"{e}"
-        )
+    job = jobs.submit_job(
+        user, "s3_delete", delete_s3_bucket,
+        bucket_name=request.bucket_name, user=user, force=request.force
+    )
+    return jobs.accepted_response(job)
 
 
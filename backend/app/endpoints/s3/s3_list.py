@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from app.authentication import get_username_from_token
-from app.cloud_api import get_s3_buckets
+from app.endpoints.s3.helper_functions import get_user_buckets
 from pydantic import BaseModel
 from typing import List
 
@@ -14,9 +14,12 @@ class S3ListResponse(BaseModel):
     buckets: List[S3BucketResponse]
 
 @router.get("/s3/list", response_model=S3ListResponse, tags=["s3"])
-async def list_buckets(username: str = Depends(get_username_from_token)):
+async def list_buckets(
+    refresh: bool = False,
+    username: str = Depends(get_username_from_token)
+):
     """
     List all S3 buckets owned by the authenticated user
     """
-    buckets = get_s3_buckets(username)
+    buckets = await get_user_buckets(username, refresh=refresh)
     return {"buckets": buckets}
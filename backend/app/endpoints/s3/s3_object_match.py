@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from app.authentication import get_username_from_token
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import (
+    verify_bucket_owned_by_user, MD5_PATTERN
+)
+
+
+router = APIRouter()
+
+
+class ObjectMatchRequest(BaseModel):
+    bucket_name: str
+    file_name: str
+    md5: str = Field(..., pattern=MD5_PATTERN)
+
+
+@router.post("/s3/object/match", tags=["s3"])
+async def s3_object_match_endpoint(
+    request: ObjectMatchRequest,
+    username: str = Depends(get_username_from_token)
+):
+    """
+    Check whether the object already has the content with this MD5, so
+    uploading it again can be skipped.
+    """
+    await verify_bucket_owned_by_user(request.bucket_name, username)
+    s3_object = await run_cloud_call(
+        "s3", cloud_api.find_unchanged_s3_object,
+        request.bucket_name, request.file_name, request.md5
+    )
+    return {
+        "bucket_name": request.bucket_name,
+        "file_name": request.file_name,
+        "unchanged": s3_object is not None
+    }
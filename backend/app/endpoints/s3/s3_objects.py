@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import json
+from app.authentication import get_username_from_token
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import verify_bucket_owned_by_user
+
+
+router = APIRouter()
+
+# Most keys list_objects_v2 returns per page
+MAX_PAGE_SIZE = 1000
+
+
+async def stream_objects(
+    bucket_name: str,
+    prefix: str,
+    delimiter: str = None,
+    cursor: str = None,
+    limit: int = None
+) -> AsyncIterator[str]:
+    """
+    Yield the bucket's objects (and common prefixes, as {"prefix": ...})
+    as NDJSON lines, one list_objects_v2 page at a time, so listing any
+    number of keys only holds one page in memory.
+    """
+    sent = 0
+    try:
+        while limit is None or sent < limit:
+            page_size = MAX_PAGE_SIZE
+            if limit is not None:
+                page_size = min(page_size, limit - sent)
+            page = await run_cloud_call(
+                "s3", cloud_api.list_s3_objects_page,
+                bucket_name, prefix, delimiter, cursor, page_size
+            )
+            for common_prefix in page["common_prefixes"]:
+                yield json.dumps({"prefix": common_prefix}) + "\n"
+            for s3_object in page["objects"]:
+                yield json.dumps(s3_object) + "\n"
+            sent += len(page["common_prefixes"]) + len(page["objects"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+    except Exception as e:
+        # The response status was already sent, so report the error inline
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
+@router.get("/s3/{bucket_name}/objects", tags=["s3"])
+async def s3_objects_endpoint(
+    bucket_name: str,
+    prefix: str = "",
+    delimiter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    stream: bool = False,
+    username: str = Depends(get_username_from_token)
+):
+    """
+    List the objects in the bucket, optionally under a prefix. With a
+    delimiter (usually "/"), keys are grouped like directories into
+    common_prefixes.
+    Objects are returned a page at a time (up to limit, or 1000): pass
+    next_cursor as cursor to get the next page.
+    With stream=true, all objects (up to limit) are sent as NDJSON as each
+    page is read.
+    """
+    await verify_bucket_owned_by_user(bucket_name, username)
+    if stream:
+        return StreamingResponse(
+            stream_objects(bucket_name, prefix, delimiter, cursor, limit),
+            media_type="application/x-ndjson"
+        )
+
+    page = await run_cloud_call(
+        "s3", cloud_api.list_s3_objects_page,
+        bucket_name, prefix, delimiter, cursor,
+        min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    )
+    return {"bucket_name": bucket_name, **page}
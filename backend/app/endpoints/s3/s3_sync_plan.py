@@ -0,0 +1,103 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from app.authentication import get_username_from_token
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.endpoints.s3.helper_functions import (
+    verify_bucket_owned_by_user, MD5_PATTERN
+)
+
+
+router = APIRouter()
+
+
+class LocalFile(BaseModel):
+    # Object key the file would be uploaded as
+    name: str
+    size: int
+    # Modification time, in seconds since the epoch
+    mtime: float
+    # MD5 of the content. When given, the file is compared by content
+    # instead of by modification time.
+    md5: Optional[str] = Field(None, pattern=MD5_PATTERN)
+
+
+class SyncPlanRequest(BaseModel):
+    bucket_name: str
+    # Only objects under this prefix are compared
+    prefix: str = ""
+    files: list[LocalFile]
+
+
+def is_file_changed(local_file: LocalFile, s3_object: dict) -> bool:
+    # Like "aws s3 sync": a different size, or a local change made after
+    # the object was uploaded
+    return (
+        local_file.size != s3_object["size"]
+        or local_file.mtime > s3_object["last_modified"].timestamp()
+    )
+
+
+async def is_content_changed(
+    bucket_name: str, local_file: LocalFile, s3_object: dict
+) -> bool:
+    """
+    Compare the file's MD5 with the object's: its ETag from the listing, or
+    else the MD5 stored in its metadata
+    """
+    if local_file.size != s3_object["size"]:
+        return True
+    if cloud_api.s3_object_matches_md5(s3_object, local_file.md5):
+        return False
+    s3_object = await run_cloud_call(
+        "s3", cloud_api.head_s3_object, bucket_name, local_file.name
+    )
+    return s3_object is None or \
+        not cloud_api.s3_object_matches_md5(s3_object, local_file.md5)
+
+
+@router.post("/s3/sync/plan", tags=["s3"])
+async def s3_sync_plan_endpoint(
+    request: SyncPlanRequest,
+    username: str = Depends(get_username_from_token)
+):
+    """
+    Compare local files with the objects in the bucket, and return the
+    ones that are new or changed and need to be uploaded. Files with an
+    md5 are compared by content, the others by size and modification time.
+    """
+    await verify_bucket_owned_by_user(request.bucket_name, username)
+    s3_objects = await run_cloud_call(
+        "s3", cloud_api.get_s3_objects_by_key,
+        request.bucket_name, request.prefix
+    )
+
+    new, changed, unchanged = [], [], 0
+    compared_by_content = []
+    for local_file in request.files:
+        s3_object = s3_objects.get(local_file.name)
+        if s3_object is None:
+            new.append(local_file.name)
+        elif local_file.md5:
+            compared_by_content.append((local_file, s3_object))
+        elif is_file_changed(local_file, s3_object):
+            changed.append(local_file.name)
+        else:
+            unchanged += 1
+    results = await asyncio.gather(*(
+        is_content_changed(request.bucket_name, local_file, s3_object)
+        for local_file, s3_object in compared_by_content
+    ))
+    for (local_file, _), is_changed in zip(compared_by_content, results):
+        if is_changed:
+            changed.append(local_file.name)
+        else:
+            unchanged += 1
+    return {
+        "bucket_name": request.bucket_name,
+        "new": new,
+        "changed": changed,
+        "unchanged": unchanged
+    }
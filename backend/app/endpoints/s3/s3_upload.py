@@ -1,35 +1,41 @@
-from fastapi import (
-    APIRouter, Depends, HTTPException, File, UploadFile, FastAPI, Form
-)
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
 from app.authentication import get_username_from_token
-from app.cloud_api import upload_file_to_s3_bucket, get_s3_buckets
-from pydantic import BaseModel
-
-
-# class UploadFileRequest(BaseModel):
-#     bucket_name: str
-#     file: UploadFile = File(...)
+from app import cloud_api
+from app.cloud_executor import run_cloud_call
+from app.s3_transfer import stream_upload_to_s3
+from app.endpoints.s3.helper_functions import (
+    verify_bucket_owned_by_user, MD5_PATTERN
+)
 
-# class UploadFileResponse(BaseModel):
-#     bucket_name: str
-#     file_name: str
-#     status: str
 
 router = APIRouter()
 
 @router.post("/s3/upload", tags=["s3"])
 async def upload_file(
-    bucket_name: str = Form(...),
-    file: UploadFile = File(...),
+    request: Request,
+    bucket_name: str,
+    file_name: str,
+    md5: Optional[str] = Query(None, pattern=MD5_PATTERN),
     user: str = Depends(get_username_from_token)
 ):
-    user_buckets = get_s3_buckets(user)
-    if bucket_name not in [bucket['name'] for bucket in user_buckets]:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Bucket {bucket_name} does not exist, or is not "
-            f"owned by user {user}."
-        )
-    return upload_file_to_s3_bucket(
-        bucket_name=bucket_name, file=file
-    )
\ No newline at end of file
+    """
+    Upload the raw request body as file_name in the bucket. The body is
+    streamed to S3 as it arrives, so it's never stored on the server.
+    With the MD5 of the file, the upload fails if the content received
+    doesn't match it, and is skipped (status "unchanged") if the object
+    already has that content. Use /s3/object/match to check that before
+    sending the file.
+    """
+    await verify_bucket_owned_by_user(bucket_name, user)
+    if md5 and await run_cloud_call(
+        "s3", cloud_api.find_unchanged_s3_object, bucket_name, file_name, md5
+    ):
+        return {
+            "bucket_name": bucket_name,
+            "file_name": file_name,
+            "status": "unchanged"
+        }
+    return await stream_upload_to_s3(
+        bucket_name, file_name, request.stream(), md5
+    )
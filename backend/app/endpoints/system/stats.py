@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends
+from app.authentication import get_username_from_token
+from app import aws_clients, password_executor
+from app.token_cache import verified_tokens
+from app.token_revocation import revoked_tokens
+from pydantic import BaseModel
+from typing import List
+
+router = APIRouter()
+
+
+class ClientPoolStatsResponse(BaseModel):
+    service: str
+    region: str
+    max_pool_connections: int
+    in_flight: int
+    peak_in_flight: int
+    total_requests: int
+    waited_for_connection: int
+
+
+class AWSClientsStatsResponse(BaseModel):
+    clients: List[ClientPoolStatsResponse]
+
+
+class TokenCacheStatsResponse(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evicted: int
+    expired: int
+    revoked: int
+
+
+class PasswordHashingStatsResponse(BaseModel):
+    workers: int
+    queue_size: int
+    pending: int
+    peak_pending: int
+    completed: int
+    rejected: int
+
+
+@router.get(
+    "/system/aws-clients",
+    response_model=AWSClientsStatsResponse,
+    tags=["system"]
+)
+async def aws_clients_stats(username: str = Depends(get_username_from_token)):
+    """
+    Connection pool usage of the backend's AWS clients, for sizing
+    max_pool_connections to the worker count
+    """
+    return {"clients": aws_clients.get_pool_stats()}
+
+
+@router.get(
+    "/system/password-hashing",
+    response_model=PasswordHashingStatsResponse,
+    tags=["system"]
+)
+async def password_hashing_stats(
+    username: str = Depends(get_username_from_token)
+):
+    """
+    Usage of the password hashing pool: logins in progress, and how many
+    were rejected because the queue was full
+    """
+    return password_executor.password_pool.get_stats()
+
+
+@router.get(
+    "/system/token-cache",
+    response_model=TokenCacheStatsResponse,
+    tags=["system"]
+)
+async def token_cache_stats(username: str = Depends(get_username_from_token)):
+    """
+    Usage of the verified token cache: how many requests found their token
+    already verified (hits), and how many had to decode it (misses). Also
+    reports how many unexpired tokens are revoked.
+    """
+    return {**verified_tokens.get_stats(), **revoked_tokens.get_stats()}
@@ -0,0 +1,35 @@
+import threading
+
+
+class InstanceReservations:
+    """
+    Instances that were requested, but aren't in the inventory yet, per
+    user. Launch jobs can wait in the job queue, and the instances only
+    exist once run_instances returns, so each batch is held against the
+    user's quota from the moment it's accepted until it's launched (or
+    failed to launch).
+    Reservations are kept in memory, per backend process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reserved: dict[str, int] = {}
+
+    def reserve(self, user: str, count: int) -> int:
+        """
+        Reserve count instances, and return the user's reserved instances,
+        these included
+        """
+        with self._lock:
+            self._reserved[user] = self._reserved.get(user, 0) + count
+            return self._reserved[user]
+
+    def release(self, user: str, count: int):
+        with self._lock:
+            remaining = self._reserved.get(user, 0) - count
+            if remaining > 0:
+                self._reserved[user] = remaining
+            else:
+                self._reserved.pop(user, None)
+
+
+instance_reservations = InstanceReservations()
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+from app import config
+from app.cloud_executor import run_cloud_call
+
+# Resource types, which are also the names of the AWS services they live in
+EC2_INSTANCES = "ec2"
+S3_BUCKETS = "s3"
+DNS_ZONES = "route53"
+
+
+class InventoryCache:
+    """
+    In-process cache of users' resources, keyed by (owner, resource type).
+    Entries expire after a TTL, and are invalidated explicitly whenever
+    ResourSphere creates, deletes, starts or stops a resource.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[tuple[str, str], tuple[float, Any]] = {}
+        # Bumped on invalidation, so a load that started before an
+        # invalidation doesn't store a stale result
+        self._generations: dict[tuple[str, str], int] = {}
+        self._load_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def peek(self, owner: str, resource_type: str) -> Optional[Any]:
+        """Return the cached value if it's still fresh, without loading it"""
+        with self._lock:
+            entry = self._entries.get((owner, resource_type))
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def get(
+        self,
+        owner: str,
+        resource_type: str,
+        loader: Callable[[], Any],
+        refresh: bool = False
+    ) -> Any:
+        key = (owner, resource_type)
+        if not refresh:
+            value = self.peek(owner, resource_type)
+            if value is not None:
+                return value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Only one thread loads a given key, the others wait for its result
+        with load_lock:
+            if not refresh:
+                value = self.peek(owner, resource_type)
+                if value is not None:
+                    return value
+            with self._lock:
+                generation = self._generations.setdefault(key, 0)
+            value = loader()
+            with self._lock:
+                if self._generations.get(key) == generation:
+                    self._entries[key] = (
+                        time.monotonic() + self.ttl_seconds, value
+                    )
+            return value
+
+    def invalidate(self, resource_type: str, owner: str = None):
+        """Invalidate the owner's entry, or every owner's if none is given"""
+        with self._lock:
+            keys = set(self._entries) | set(self._generations)
+            for key in keys:
+                if key[1] == resource_type and owner in (None, key[0]):
+                    self._entries.pop(key, None)
+                    self._generations[key] = self._generations.get(key, 0) + 1
+
+
+inventory_cache = InventoryCache(config.INVENTORY_CACHE_TTL_SECONDS)
+
+
+async def get_inventory(
+    owner: str,
+    resource_type: str,
+    loader: Callable[[], Any],
+    refresh: bool = False
+) -> Any:
+    """
+    Get the owner's resources of the given type. Served from memory when
+    cached, and loaded in the AWS thread pool on a miss or a refresh.
+    """
+    if not refresh:
+        value = inventory_cache.peek(owner, resource_type)
+        if value is not None:
+            return value
+    return await run_cloud_call(
+        resource_type, inventory_cache.get, owner, resource_type, loader,
+        refresh
+    )
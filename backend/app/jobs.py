@@ -0,0 +1,147 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from fastapi import HTTPException
+from pydantic import BaseModel
+from app import config
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class Job(BaseModel):
+    job_id: str
+    owner: str
+    action: str
+    status: str = JOB_PENDING
+    progress: str = ""
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=config.JOB_WORKERS, thread_name_prefix="resoursphere-job"
+)
+_jobs: dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+# Lets code running inside a job report progress without knowing its job ID
+_current_job = threading.local()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _update_job(job_id: str, **fields):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job:
+            for field, value in fields.items():
+                setattr(job, field, value)
+            job.updated_at = _now()
+
+
+def _prune_finished_jobs():
+    """Drop finished jobs older than the configured retention period."""
+    cutoff = _now() - timedelta(minutes=config.JOB_RETENTION_MINUTES)
+    with _jobs_lock:
+        expired = [
+            job_id for job_id, job in _jobs.items()
+            if job.status in FINISHED_STATES and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            del _jobs[job_id]
+
+
+def _run_job(job_id: str, func: Callable, args: tuple, kwargs: dict):
+    _current_job.job_id = job_id
+    _update_job(job_id, status=JOB_RUNNING)
+    try:
+        result = func(*args, **kwargs)
+        _update_job(job_id, status=JOB_SUCCEEDED, result=result,
+                    progress="Done")
+    except HTTPException as e:
+        _update_job(job_id, status=JOB_FAILED, error=str(e.detail),
+                    status_code=e.status_code)
+    except Exception as e:
+        _update_job(job_id, status=JOB_FAILED, error=str(e), status_code=500)
+    finally:
+        _current_job.job_id = None
+
+
+def submit_job(owner: str, action: str, func: Callable, *args, **kwargs) -> Job:
+    """
+    Run func(*args, **kwargs) in the background job executor and return
+    the job record right away.
+    """
+    _prune_finished_jobs()
+    created_at = _now()
+    job = Job(
+        job_id=str(uuid.uuid4()),
+        owner=owner,
+        action=action,
+        created_at=created_at,
+        updated_at=created_at
+    )
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+    _executor.submit(_run_job, job.job_id, func, args, kwargs)
+    return job.model_copy()
+
+
+def current_job_id() -> Optional[str]:
+    """
+    The ID of the job running in the current thread. Code that hands work
+    to other threads passes it on, since it's only known to this thread.
+    """
+    return getattr(_current_job, "job_id", None)
+
+
+def report_progress(message: str, job_id: str = None):
+    """
+    Update the progress message of the job, by default the one running in
+    the current thread. Does nothing when called outside of a job.
+    """
+    job_id = job_id or current_job_id()
+    if job_id:
+        _update_job(job_id, progress=message)
+
+
+def get_job(job_id: str, owner: str) -> Job:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job or job.owner != owner:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Job {job_id} not found"
+            )
+        return job.model_copy()
+
+
+def list_jobs(owner: str) -> list[Job]:
+    with _jobs_lock:
+        return [
+            job.model_copy() for job in _jobs.values() if job.owner == owner
+        ]
+
+
+def accepted_response(job: Job) -> dict:
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.job_id}"
+    }
@@ -1,19 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.endpoints.ec2 import (
     ec2_create, ec2_list, ec2_delete, ec2_start, ec2_stop
 )
-from app.endpoints.auth import login
-from app.endpoints.s3 import s3_create, s3_list, s3_delete, s3_upload
+from app.endpoints.auth import login, refresh, logout
+from app.endpoints.s3 import (
+    s3_create, s3_list, s3_delete, s3_upload,
+    presign_upload, presign_complete, presign_abort, presign_download,
+    s3_sync_plan, s3_object_match, s3_objects
+)
 from app.endpoints.route53 import (
-    zone_create, zone_delete, zone_list
+    zone_create, zone_delete, zone_list, record_change, zone_sync
 )
+from app.endpoints.jobs import job_status, job_list
+from app.endpoints.system import stats
+from app.token_revocation import revoked_tokens
 import uvicorn
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Read the revoked tokens before serving, instead of in the first
+    # authenticated request
+    revoked_tokens.load()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(ec2_create.router)
 app.include_router(login.router)
+app.include_router(refresh.router)
+app.include_router(logout.router)
 app.include_router(ec2_list.router)
 app.include_router(ec2_delete.router)
 app.include_router(ec2_start.router)
@@ -22,9 +40,21 @@ app.include_router(s3_create.router)
 app.include_router(s3_list.router)
 app.include_router(s3_delete.router)
 app.include_router(s3_upload.router)
+app.include_router(presign_upload.router)
+app.include_router(presign_complete.router)
+app.include_router(presign_abort.router)
+app.include_router(presign_download.router)
+app.include_router(s3_sync_plan.router)
+app.include_router(s3_object_match.router)
+app.include_router(s3_objects.router)
 app.include_router(zone_create.router)
 app.include_router(zone_delete.router)
 app.include_router(zone_list.router)
+app.include_router(record_change.router)
+app.include_router(zone_sync.router)
+app.include_router(job_status.router)
+app.include_router(job_list.router)
+app.include_router(stats.router)
 
 
 @app.get("/")
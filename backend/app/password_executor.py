@@ -0,0 +1,73 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from fastapi import HTTPException, status
+from app import config
+from app.authentication import hash_password, verify_password
+
+
+class PasswordHashingPool:
+    """
+    Runs bcrypt hashing and verification in dedicated threads, so a login
+    never blocks the event loop. bcrypt releases the GIL while it works,
+    so the threads run in parallel.
+    At most `workers` run at once and `queue_size` more wait for a thread.
+    Beyond that, calls are rejected right away with 503 instead of piling
+    up behind work that would take seconds to drain.
+    """
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="resoursphere-bcrypt"
+        )
+        # Only updated from the event loop, so it needs no lock
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, func: Callable, *args):
+        if self._pending >= self.workers + self.queue_size:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins in progress, try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args)
+            )
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "completed": self._completed,
+            "rejected": self._rejected
+        }
+
+
+password_pool = PasswordHashingPool(
+    config.PASSWORD_HASHING_WORKERS, config.PASSWORD_HASHING_QUEUE_SIZE
+)
+
+
+async def run_hash_password(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def run_verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(
+        verify_password, plain_password, hashed_password
+    )
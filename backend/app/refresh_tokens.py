@@ -0,0 +1,27 @@
+from app.token_revocation import TokenRevocationList, revoked_tokens
+
+
+class RefreshTokenRotation:
+    """
+    Makes each refresh token usable once. A used token is revoked until
+    it expires, in the revocation list, so reuse is still detected after
+    a restart and by the other backend processes.
+    Presenting a used token again means it was copied: the caller revokes
+    every token of its family (the tokens refreshed from the same login),
+    so neither the thief nor the user can keep refreshing, and the user
+    has to log in again.
+    """
+    def __init__(self, revocation_list: TokenRevocationList):
+        self.revocation_list = revocation_list
+
+    def use(self, jti: str, family: str, expires_at: float) -> bool:
+        """
+        Mark the token as used. Returns False if it can't be used: it was
+        used already, or its family was revoked.
+        """
+        if self.revocation_list.is_revoked(family):
+            return False
+        return self.revocation_list.revoke_once(jti, expires_at)
+
+
+refresh_token_rotation = RefreshTokenRotation(revoked_tokens)
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+from typing import AsyncIterator
+from fastapi import HTTPException
+from app import cloud_api, config
+from app.cloud_executor import run_cloud_call
+
+
+async def stream_upload_to_s3(
+    bucket_name: str,
+    key: str,
+    chunks: AsyncIterator[bytes],
+    md5: str = None
+) -> dict:
+    """
+    Stream an upload straight into S3 while it's being received. The body
+    is cut into parts of S3_UPLOAD_PART_SIZE that are uploaded in parallel,
+    at most S3_UPLOAD_PART_CONCURRENCY at a time. Reading the body waits
+    when all of them are busy, so memory use per upload stays bounded no
+    matter how large the file is.
+    Bodies smaller than one part are uploaded with a single put_object.
+    If anything fails, the multipart upload is aborted.
+    With an MD5, it's stored in the object's metadata, and the upload fails
+    if the content that was received doesn't match it.
+    """
+    part_size = config.S3_UPLOAD_PART_SIZE
+    part_slots = asyncio.Semaphore(config.S3_UPLOAD_PART_CONCURRENCY)
+    buffer = bytearray()
+    upload_id = None
+    part_tasks = []
+    size = 0
+    content_md5 = hashlib.md5()
+
+    async def upload_part(part_number: int, body: bytes) -> dict:
+        try:
+            return await run_cloud_call(
+                "s3", cloud_api.upload_s3_part,
+                bucket_name, key, upload_id, part_number, body
+            )
+        finally:
+            part_slots.release()
+
+    async def send_part(body: bytes):
+        nonlocal upload_id
+        if upload_id is None:
+            upload_id = await run_cloud_call(
+                "s3", cloud_api.create_s3_multipart_upload,
+                bucket_name, key, md5
+            )
+        await part_slots.acquire()
+        # Stop reading the body as soon as a part failed
+        for task in part_tasks:
+            if task.done() and task.exception():
+                part_slots.release()
+                raise task.exception()
+        part_tasks.append(asyncio.create_task(
+            upload_part(len(part_tasks) + 1, body)
+        ))
+
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            content_md5.update(chunk)
+            buffer += chunk
+            while len(buffer) >= part_size:
+                await send_part(bytes(buffer[:part_size]))
+                del buffer[:part_size]
+
+        if md5 and content_md5.hexdigest() != md5:
+            raise HTTPException(
+                status_code=400,
+                detail=f"The uploaded content doesn't match MD5 {md5}"
+            )
+
+        if upload_id is None:
+            result = await run_cloud_call(
+                "s3", cloud_api.put_s3_object,
+                bucket_name, key, bytes(buffer), md5
+            )
+            return {**result, "size": size, "parts": 1}
+
+        if buffer:
+            await send_part(bytes(buffer))
+        parts = await asyncio.gather(*part_tasks)
+        result = await run_cloud_call(
+            "s3", cloud_api.complete_s3_multipart_upload,
+            bucket_name, key, upload_id, parts
+        )
+        return {**result, "size": size, "parts": len(parts)}
+
+    except BaseException:
+        # Let the parts in flight finish before aborting, otherwise they
+        # could be stored after the abort
+        await asyncio.gather(*part_tasks, return_exceptions=True)
+        if upload_id is not None:
+            try:
+                await run_cloud_call(
+                    "s3", cloud_api.abort_s3_multipart_upload,
+                    bucket_name, key, upload_id
+                )
+            except Exception:
+                # The original error is the one worth reporting
+                pass
+        raise
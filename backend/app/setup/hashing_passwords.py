@@ -1,5 +1,5 @@
-from ..authentication import  get_password_hash
+from ..authentication import hash_password
 password = input("Enter a password: ")
-pass_hash = get_password_hash(password)
+pass_hash = hash_password(password)
 print("Hash: ")
-print(hash)
\ No newline at end of file
+print(pass_hash)
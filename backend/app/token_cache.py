@@ -0,0 +1,93 @@
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from app import config
+
+
+class VerifiedTokenCache:
+    """
+    A bounded LRU of access tokens whose signature was already verified,
+    so repeated requests with the same token skip decoding it. Entries are
+    keyed by the token's SHA-256 digest (the token itself is never kept),
+    hold its claims and the principal built from them, and are evicted
+    when the token expires.
+    Only the signature check is cached: callers still check revocation
+    and the permissions version on every hit.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[float, dict, Any]] = OrderedDict()
+        # (expiry, key) of every entry, soonest first
+        self._expiries: list[tuple[float, bytes]] = []
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+        self._expired = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _drop_expired(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self._entries.get(key)
+            if entry and entry[0] == expires_at:
+                del self._entries[key]
+                self._expired += 1
+
+    def get(self, key: bytes) -> Optional[tuple[dict, Any]]:
+        """The claims and principal of a verified token, if it's cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: bytes, claims: dict, principal: Any):
+        expires_at = claims.get("exp")
+        if self.max_size <= 0 or not expires_at:
+            return
+        with self._lock:
+            self._drop_expired(time.time())
+            self._entries[key] = (expires_at, claims, principal)
+            self._entries.move_to_end(key)
+            heapq.heappush(self._expiries, (expires_at, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+            # Evicted and discarded entries stay in the heap until they
+            # expire. Rebuild it from the live entries when they pile up,
+            # so it stays bounded by max_size too.
+            if len(self._expiries) > 2 * self.max_size:
+                self._expiries = [
+                    (entry[0], entry_key)
+                    for entry_key, entry in self._entries.items()
+                ]
+                heapq.heapify(self._expiries)
+
+    def discard(self, key: bytes):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._drop_expired(time.time())
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evicted": self._evicted,
+                "expired": self._expired
+            }
+
+
+verified_tokens = VerifiedTokenCache(config.TOKEN_CACHE_SIZE)
@@ -0,0 +1,133 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from app import config
+
+
+class TokenRevocationList:
+    """
+    The IDs (jti) of revoked tokens, until the tokens expire. Every
+    revocation is also written to a SQLite file, so revocations survive
+    restarts. The file is read by load() at startup (or else on first
+    use), with a single query after deleting the expired IDs, which keeps
+    startup fast even with hundreds of thousands of revoked tokens.
+    Checks are a dictionary lookup, and IDs that aren't in it are looked
+    up by primary key in the file, so revocations made by other worker
+    processes apply too. Each thread reads through its own connection.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._readers = threading.local()
+        self._revoked: dict[str, float] = {}
+        # (expiry, jti) of every revoked token, soonest first
+        self._expiries: list[tuple[float, str]] = []
+
+    def load(self):
+        with self._lock:
+            if self._db is not None:
+                return
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            db = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+                "jti TEXT PRIMARY KEY, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            db.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at <= ?",
+                (time.time(),)
+            )
+            rows = db.execute(
+                "SELECT jti, expires_at FROM revoked_tokens"
+            ).fetchall()
+            self._revoked = dict(rows)
+            self._expiries = [(expires_at, jti) for jti, expires_at in rows]
+            heapq.heapify(self._expiries)
+            self._db = db
+
+    def _drop_expired(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._expiries)
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        if self._db is None:
+            self.load()
+        expires_at = self._revoked.get(jti)
+        if expires_at is None:
+            expires_at = self._read_expiry(jti)
+            if expires_at is None:
+                return False
+            # Revoked by another process, keep it for the next checks
+            with self._lock:
+                self._revoked[jti] = expires_at
+                heapq.heappush(self._expiries, (expires_at, jti))
+        return expires_at > time.time()
+
+    def _read_expiry(self, jti: str) -> Optional[float]:
+        reader = getattr(self._readers, "db", None)
+        if reader is None:
+            reader = sqlite3.connect(self.db_path, isolation_level=None)
+            self._readers.db = reader
+        row = reader.execute(
+            "SELECT expires_at FROM revoked_tokens WHERE jti = ?", (jti,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def revoke(self, jti: str, expires_at: float):
+        """Revoke the token until it expires"""
+        now = time.time()
+        if expires_at <= now:
+            return
+        if self._db is None:
+            self.load()
+        with self._lock:
+            self._drop_expired(now)
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiries, (expires_at, jti))
+            self._db.execute(
+                "INSERT OR REPLACE INTO revoked_tokens VALUES (?, ?)",
+                (jti, expires_at)
+            )
+
+    def revoke_once(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoke the token, unless it was revoked already. Returns whether
+        it was revoked by this call. The check and the write happen in
+        one insert, so it holds across processes sharing the file.
+        """
+        if self._db is None:
+            self.load()
+        with self._lock:
+            self._drop_expired(time.time())
+            if jti in self._revoked:
+                return False
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO revoked_tokens VALUES (?, ?)",
+                (jti, expires_at)
+            ).rowcount
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiries, (expires_at, jti))
+            return inserted == 1
+
+    def get_stats(self) -> dict:
+        if self._db is None:
+            self.load()
+        with self._lock:
+            self._drop_expired(time.time())
+            return {"revoked": len(self._revoked)}
+
+
+revoked_tokens = TokenRevocationList(config.REVOCATION_DB_PATH)
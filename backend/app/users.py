@@ -1,46 +1,190 @@
 import os
+import hashlib
+import json
+import logging
+import threading
+import time
 import yaml
-from pydantic import BaseModel, Field
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+from pydantic import (
+    BaseModel, ConfigDict, Field, field_serializer, field_validator
+)
+from app import config
+
+logger = logging.getLogger(__name__)
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+USERS_FILE = f"{CURRENT_DIR}/config/users.yml"
+GROUPS_FILE = f"{CURRENT_DIR}/config/groups.yml"
 
 def load_users_db():
-    with open(f"{CURRENT_DIR}/config/users.yml", "r") as users_config:
+    with open(USERS_FILE, "r") as users_config:
         users_db = yaml.safe_load(users_config)
     return users_db
 
 def load_groups_config():
-    with open(f"{CURRENT_DIR}/config/groups.yml", "r") as groups_config:
+    with open(GROUPS_FILE, "r") as groups_config:
         groups = yaml.safe_load(groups_config)
     return groups
 
 
-# def load_users_db():
-#     with open(f"{CURRENT_DIR}/config/users.yml", "r") as users:
-#         return users_db
-
 class Permissions(BaseModel):
+    """
+    A user's permissions, with their group's merged in. Instances are
+    shared between requests, so they're immutable.
+    """
+    model_config = ConfigDict(frozen=True)
+
     ec2_max_running: int = 0
-    ec2_instance_types: list[str] = Field(default_factory=list)
-    ami_choice: dict[str, str] = Field(default_factory=dict)
-
-def get_user(username):
-    users_db = load_users_db()
-    return users_db.get(username)
-
-def get_user_permissions(username):
-    users_db = load_users_db()
-    groups = load_groups_config()
-    user = users_db.get(username)
-    permissions = {}
-    # if not user:
-    #     return None
-    # else:
-    user_group = user.get("group")
-    if user_group:
-        permissions.update(groups.get(user_group, {}).get("permissions", {}))
-    permissions.update(user.get("permissions", {}))
-    return Permissions(**permissions)
-
-# print(groups)
-# print(get_user_permissions("roysahar"))
+    ec2_instance_types: frozenset[str] = frozenset()
+    ami_choice: Mapping[str, str] = Field(default_factory=dict)
+    # The AMI IDs of ami_choice, for lookups by ID
+    ami_ids: frozenset[str] = Field(frozenset(), exclude=True)
+
+    @field_validator("ami_choice", mode="after")
+    @classmethod
+    def freeze_ami_choice(cls, ami_choice: Mapping[str, str]):
+        return MappingProxyType(dict(ami_choice))
+
+    @field_serializer("ec2_instance_types")
+    def serialize_instance_types(self, instance_types: frozenset[str]):
+        return sorted(instance_types)
+
+    @field_serializer("ami_choice")
+    def serialize_ami_choice(self, ami_choice: Mapping[str, str]):
+        return dict(ami_choice)
+
+    def allows_ami(self, ami: str) -> bool:
+        """Whether the AMI, by name or by ID, is one of the user's choices"""
+        return ami in self.ami_choice or ami in self.ami_ids
+
+    def to_claim(self, version: str) -> dict:
+        """A compact form to sign into access tokens"""
+        return {
+            "v": version,
+            "m": self.ec2_max_running,
+            "t": sorted(self.ec2_instance_types),
+            "a": dict(self.ami_choice)
+        }
+
+    def digest(self) -> str:
+        """Short digest of the permissions, to tell when they've changed"""
+        content = json.dumps(self.model_dump(mode="json"), sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_claim(cls, claim: dict) -> "Permissions":
+        return cls(
+            ec2_max_running=claim.get("m", 0),
+            ec2_instance_types=frozenset(claim.get("t", [])),
+            ami_choice=claim.get("a", {}),
+            ami_ids=frozenset(claim.get("a", {}).values())
+        )
+
+
+@dataclass(frozen=True)
+class PermissionIndex:
+    """
+    users.yml and groups.yml, compiled: every user's entry and merged
+    permissions, indexed by username
+    """
+    users: Mapping[str, Mapping]
+    permissions: Mapping[str, Permissions]
+    # Digest of each user's permissions, so editing the config only makes
+    # the tokens of the users whose permissions changed stale
+    versions: Mapping[str, str]
+    # Modification times of the config files when they were read
+    mtimes: tuple
+
+    def version(self, username: str) -> str:
+        return self.versions.get(username, NO_PERMISSIONS_VERSION)
+
+
+NO_PERMISSIONS_VERSION = Permissions().digest()
+
+
+def _config_mtimes() -> tuple:
+    return tuple(
+        os.stat(path).st_mtime_ns for path in (USERS_FILE, GROUPS_FILE)
+    )
+
+def _compile_permission_index(mtimes: tuple) -> PermissionIndex:
+    configs = []
+    for path in (USERS_FILE, GROUPS_FILE):
+        with open(path, "rb") as config_file:
+            configs.append(yaml.safe_load(config_file) or {})
+    users_db, groups = configs
+
+    users, permissions, versions = {}, {}, {}
+    for username, user in users_db.items():
+        merged = {}
+        user_group = user.get("group")
+        if user_group:
+            merged.update(groups.get(user_group, {}).get("permissions", {}))
+        merged.update(user.get("permissions") or {})
+        users[username] = MappingProxyType(dict(user))
+        permissions[username] = Permissions(
+            **merged,
+            ami_ids=frozenset((merged.get("ami_choice") or {}).values())
+        )
+        versions[username] = permissions[username].digest()
+    return PermissionIndex(
+        users=MappingProxyType(users),
+        permissions=MappingProxyType(permissions),
+        versions=MappingProxyType(versions),
+        mtimes=mtimes
+    )
+
+
+_index: Optional[PermissionIndex] = None
+_failed_mtimes: Optional[tuple] = None
+_next_check = 0.0
+_index_lock = threading.Lock()
+
+def get_permission_index() -> PermissionIndex:
+    """
+    Return the compiled users and permissions. They're compiled again when
+    users.yml or groups.yml is modified, so edits apply without a restart.
+    The files are checked at most every PERMISSIONS_RELOAD_CHECK_SECONDS.
+    If a modified file can't be compiled, the previous index stays in use
+    until the file is modified again.
+    """
+    global _index, _failed_mtimes, _next_check
+    index = _index
+    now = time.monotonic()
+    if index is not None and now < _next_check:
+        return index
+    mtimes = _config_mtimes()
+    _next_check = now + config.PERMISSIONS_RELOAD_CHECK_SECONDS
+    if index is not None and (
+        index.mtimes == mtimes or _failed_mtimes == mtimes
+    ):
+        return index
+    with _index_lock:
+        if _index is None or (
+            _index.mtimes != mtimes and _failed_mtimes != mtimes
+        ):
+            try:
+                _index = _compile_permission_index(mtimes)
+                _failed_mtimes = None
+            except Exception:
+                if _index is None:
+                    raise
+                logger.exception(
+                    "Failed to reload the users and groups config, "
+                    "keeping the previous one"
+                )
+                _failed_mtimes = mtimes
+        return _index
+
+def get_permissions_version(username) -> str:
+    return get_permission_index().version(username)
+
+def get_user(username) -> Optional[Mapping]:
+    return get_permission_index().users.get(username)
+
+def get_user_permissions(username) -> Permissions:
+    """The user's permissions, or none at all for unknown users"""
+    return get_permission_index().permissions.get(username, Permissions())
@@ -0,0 +1,122 @@
+"""
+Benchmark the backend's login throughput by password hashing pool size.
+
+Runs the /auth/login endpoint in-process against a benchmark user whose
+password is hashed with the configured bcrypt_rounds (or --rounds), and
+reports logins per second, logins rejected because the queue was full, and
+how late the event loop got (the longest delay of a 10 ms timer running
+alongside the logins).
+
+    python dev/login_benchmark.py --pool-sizes 1 2 4 8 --logins 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+)
+
+from fastapi import HTTPException
+from app import config, users, password_executor
+from app.authentication import hash_password
+from app.endpoints.auth.login import login, LoginRequest
+
+BENCHMARK_USER = "login-benchmark"
+BENCHMARK_PASSWORD = "login-benchmark-password"
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """The longest delay of a timer firing every interval, in seconds"""
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+async def run_logins(logins: int) -> tuple[int, int]:
+    """Send all the logins at once, and count the successful and rejected"""
+    async def one_login() -> bool:
+        try:
+            await login(LoginRequest(
+                username=BENCHMARK_USER, password=BENCHMARK_PASSWORD
+            ))
+            return True
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            return False
+
+    results = await asyncio.gather(*(one_login() for _ in range(logins)))
+    return sum(results), len(results) - sum(results)
+
+
+async def benchmark(pool_size: int, queue_size: int, logins: int) -> dict:
+    password_executor.password_pool = password_executor.PasswordHashingPool(
+        pool_size, queue_size
+    )
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    start = time.perf_counter()
+    succeeded, rejected = await run_logins(logins)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return {
+        "pool_size": pool_size,
+        "succeeded": succeeded,
+        "rejected": rejected,
+        "logins_per_second": succeeded / elapsed,
+        "max_loop_lag_ms": await lag_task * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8]
+    )
+    parser.add_argument(
+        "--logins", type=int, default=64, help="Concurrent logins per run"
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=None,
+        help="Queue size of the pool (default: room for every login)"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=config.BCRYPT_ROUNDS,
+        help="bcrypt work factor of the benchmark user's password"
+    )
+    args = parser.parse_args()
+
+    config.BCRYPT_ROUNDS = args.rounds
+    password_hash = hash_password(BENCHMARK_PASSWORD)
+    benchmark_user = {"username": BENCHMARK_USER, "password_hash": password_hash}
+    get_user = users.get_user
+    users.get_user = lambda username: (
+        benchmark_user if username == BENCHMARK_USER else get_user(username)
+    )
+
+    print(
+        f"{args.logins} concurrent logins, bcrypt rounds {args.rounds}, "
+        f"{os.cpu_count()} CPUs"
+    )
+    print(f"{'Pool':>6} {'Logins/s':>10} {'OK':>6} {'Rejected':>9} "
+          f"{'Max loop lag (ms)':>18}")
+    for pool_size in args.pool_sizes:
+        queue_size = args.queue_size
+        if queue_size is None:
+            queue_size = args.logins
+        result = asyncio.run(benchmark(pool_size, queue_size, args.logins))
+        print(
+            f"{result['pool_size']:>6} {result['logins_per_second']:>10.1f} "
+            f"{result['succeeded']:>6} {result['rejected']:>9} "
+            f"{result['max_loop_lag_ms']:>18.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,63 @@
 import requests
 import typer
 import json
+import time
 from app import config
 # from app.authentication import get_logged_in_user
 base_url = config.BACKEND_URL
 
+# The detail of the 401 the backend returns for tokens signed with
+# permissions that have changed since (stale_token_permissions: reject)
+STALE_PERMISSIONS_DETAIL = "Permissions have changed since the token"
+# Stale tokens the hook refreshed, to the tokens that replaced them, for
+# commands that keep sending the header they started with
+_refreshed_tokens = {}
+
+
+def retry_with_refreshed_token(response, **kwargs):
+    """
+    Response hook: when the saved token was rejected because the user's
+    permissions changed, refresh it once and send the request again.
+    """
+    if response.status_code != 401 or not isinstance(
+        response.request.body, (bytes, str, type(None))
+    ):
+        return response
+    try:
+        detail = response.json().get("detail") or ""
+    except ValueError:
+        return response
+    stale_token = response.request.headers.get(
+        "Authorization", ""
+    ).removeprefix("Bearer ")
+    if not detail.startswith(STALE_PERMISSIONS_DETAIL):
+        return response
+    token = _refreshed_tokens.get(stale_token)
+    if token is None:
+        # Tokens given through the environment aren't refreshed
+        if stale_token != config.read_login_token():
+            return response
+        from app.authentication import refresh_saved_token
+        token = refresh_saved_token(stale_token)
+        if not token or token == stale_token:
+            return response
+        _refreshed_tokens[stale_token] = token
+    retry = response.request.copy()
+    retry.headers["Authorization"] = f"Bearer {token}"
+    # The retry doesn't go through this hook again
+    retry.hooks = requests.hooks.default_hooks()
+    return session.send(retry, **kwargs)
+
+
+session = requests.Session()
+session.hooks["response"].append(retry_with_refreshed_token)
+
+
 def send_login_request(username: str, password: str) -> dict:
     """Send a login request to the backend."""
     url = f"{base_url}/auth/login"
     try:
-        response = requests.post(url, json={
+        response = session.post(url, json={
             "username": username,
             "password": password
         })
@@ -27,20 +75,35 @@ def send_login_request(username: str, password: str) -> dict:
         raise typer.Exit()
     
 
+def send_logout_request(authentication_header: dict, refresh_token: str) -> dict:
+    """Revoke the session's tokens on the backend."""
+    url = f"{base_url}/auth/logout"
+    response = session.post(url, headers=authentication_header, json={
+        "refresh_token": refresh_token or None
+    })
+    if response.status_code == 200:
+        return response.json()
+    raise Exception(response.json().get("detail"))
+
+
 def send_ec2_create_request(
         authentication_header: dict,
         ami: str,
         instance_type: str,
-        name: str) -> dict:
+        name: str,
+        region: str = None,
+        count: int = 1) -> dict:
     """Send a create EC2 request to the backend."""
     url = f"{base_url}/ec2/create"
     try:
-        response = requests.post(url, headers=authentication_header, json={
+        response = session.post(url, headers=authentication_header, json={
             "ami": ami,
             "instance_type": instance_type,
-            "name": name
+            "name": name,
+            "region": region,
+            "count": count
         })
-        if response.status_code == 200:
+        if response.status_code == 202:
             data = response.json()
             return data
         elif response.status_code == 401:
@@ -61,7 +124,7 @@ def send_ec2_create_request(
 def send_ec2_list_request(authentication_header: dict) -> dict:
     url = f"{base_url}/ec2/list"
     try:
-        response = requests.get(url, headers=authentication_header)
+        response = session.get(url, headers=authentication_header)
         if response.status_code == 200:
             data = response.json()
             return data.get("instances", [])
@@ -76,24 +139,58 @@ def send_ec2_list_request(authentication_header: dict) -> dict:
         else:
             raise e
 
-def send_ec2_delete_request(authentication_header: dict, instance: str) -> dict:
+def stream_ec2_list_request(
+    authentication_header: dict,
+    state: str = None,
+    name_prefix: str = None,
+    limit: int = None,
+    region: str = None
+):
+    """Yield the user's instances as the backend streams them (NDJSON)."""
+    url = f"{base_url}/ec2/list"
+    params = {"stream": True, "state": state, "name_prefix": name_prefix,
+              "limit": limit, "region": region}
+    try:
+        with session.get(
+            url, headers=authentication_header, stream=True,
+            params={key: value for key, value in params.items() if value}
+        ) as response:
+            if response.status_code != 200:
+                typer.echo(f"Error requesting EC2 list: {response.text}")
+                typer.echo(f"HTTP Status code: {response.status_code}")
+                raise typer.Exit()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                instance = json.loads(line)
+                if "error" in instance:
+                    typer.echo(f"Error requesting EC2 list: {instance['error']}")
+                    raise typer.Exit()
+                yield instance
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting EC2 list: {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+def send_ec2_delete_request(
+        authentication_header: dict, instances: list[str]
+) -> dict:
     url = f"{base_url}/ec2/delete"
     try:
-        response = requests.delete(url, headers=authentication_header, json={
-            "instance": instance
+        response = session.delete(url, headers=authentication_header, json={
+            "instances": instances
         })
-        if response.status_code == 200:
-            data = response.json()
-            return f"Instance {data.get('instance_id')} terminated successfully."
-        elif (
-            response.status_code == 404
-            and response.text == "Instance not found"
-        ):
-            return (
-                f"Instance {instance} not found or does not belong to "
-                f"your user. Note: You can only delete instances "
+        if response.status_code == 202:
+            return response.json()
+        elif response.status_code == 404:
+            typer.echo(
+                f"Instance(s) {', '.join(instances)} not found or do not "
+                f"belong to your user. Note: You can only delete instances "
                 "created using ResourceSphere."
             )
+            raise typer.Exit()
         else:
             typer.echo(f"Error requesting EC2 deletion: {response.text}")
             typer.echo(f"HTTP Status code: {response.status_code}")
@@ -105,15 +202,17 @@ def send_ec2_delete_request(authentication_header: dict, instance: str) -> dict:
         else:
             raise e
 
-def send_ec2_start_request(authentication_header: dict, instance_id: str) -> dict:
+def send_ec2_start_request(
+        authentication_header: dict, instances: list[str]
+) -> dict:
     url = f"{base_url}/ec2/start"
     try:
-        response = requests.post(url, headers=authentication_header, json={
-            "instance": instance_id
+        response = session.post(url, headers=authentication_header, json={
+            "instances": instances
         })
         response_data = response.json()
-        if response.status_code == 200:
-            return f"Instance {response_data.get('instance_id')} started successfully."
+        if response.status_code == 202:
+            return response_data
         else:
             typer.echo(
                 f"Error requesting EC2 start: {response_data.get('detail')}"
@@ -127,15 +226,17 @@ def send_ec2_start_request(authentication_header: dict, instance_id: str) -> dic
         else:
             raise e
 
-def send_ec2_stop_request(authentication_header: dict, instance_id: str) -> dict:
+def send_ec2_stop_request(
+        authentication_header: dict, instances: list[str]
+) -> dict:
     url = f"{base_url}/ec2/stop"
     try:
-        response = requests.post(url, headers=authentication_header, json={
-            "instance": instance_id
+        response = session.post(url, headers=authentication_header, json={
+            "instances": instances
         })
         response_data = response.json()
-        if response.status_code == 200:
-            return f"Instance {response_data.get('instance_id')} stopped successfully."
+        if response.status_code == 202:
+            return response_data
         else:
             typer.echo(
                 f"Error requesting EC2 stop: {response_data.get('detail')}"
@@ -151,19 +252,21 @@ def send_ec2_stop_request(authentication_header: dict, instance_id: str) -> dict
 
 
 def send_s3_create_request(
-        authentication_header: dict, name: str, public: bool=False
+        authentication_header: dict, name: str, public: bool=False,
+        region: str = None
 ) -> dict:
     url = f"{base_url}/s3/create"
     try:
-        api_response = requests.post(url, headers=authentication_header, json={
+        api_response = session.post(url, headers=authentication_header, json={
             "bucket_name": name,
-            "public_access": public
+            "public_access": public,
+            "region": region
         })
         # Debug output
         # typer.echo(f"Response status code: {api_response.status_code}")
         # typer.echo(f"Response content: {api_response.text}")
         
-        if api_response.status_code == 200:
+        if api_response.status_code == 202:
             try:
                 data = api_response.json()
                 return data
@@ -190,7 +293,7 @@ def send_s3_create_request(
 def send_s3_list_request(authentication_header: dict) -> dict:
     url = f"{base_url}/s3/list"
     try:
-        response = requests.get(url, headers=authentication_header)
+        response = session.get(url, headers=authentication_header)
         data = response.json()
         if response.status_code == 200:
             return data
@@ -205,16 +308,61 @@ def send_s3_list_request(authentication_header: dict) -> dict:
         else:
             raise e
 
+def stream_s3_objects_request(
+    authentication_header: dict,
+    bucket_name: str,
+    prefix: str = "",
+    delimiter: str = None,
+    limit: int = None
+):
+    """
+    Yield the bucket's objects (and common prefixes) as the backend
+    streams them (NDJSON).
+    """
+    url = f"{base_url}/s3/{bucket_name}/objects"
+    params = {"stream": True, "prefix": prefix, "delimiter": delimiter,
+              "limit": limit}
+    try:
+        with session.get(
+            url, headers=authentication_header, stream=True,
+            params={key: value for key, value in params.items() if value}
+        ) as response:
+            if response.status_code != 200:
+                typer.echo(
+                    f"Error requesting S3 objects list: "
+                    f"{response.json().get('detail')}"
+                )
+                typer.echo(f"HTTP Status code: {response.status_code}")
+                raise typer.Exit()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                s3_object = json.loads(line)
+                if "error" in s3_object:
+                    typer.echo(
+                        f"Error requesting S3 objects list: {s3_object['error']}"
+                    )
+                    raise typer.Exit()
+                yield s3_object
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting S3 objects list: {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
 def send_s3_delete_request(
-    authentication_header: dict, bucket_name: str
+    authentication_header: dict, bucket_name: str, force: bool = False
 ) -> dict:
     url = f"{base_url}/s3/delete"
     try:
-        response = requests.delete(url, headers=authentication_header, json={
-            "bucket_name": bucket_name
+        response = session.delete(url, headers=authentication_header, json={
+            "bucket_name": bucket_name,
+            "force": force
         })
         data = response.json()
-        if response.status_code == 200:
+        if response.status_code == 202:
             return data
         elif response.status_code == 404:
             typer.echo(
@@ -235,15 +383,27 @@ def send_s3_delete_request(
             raise e
 
 def send_s3_upload_request(
-    authentication_header: dict, bucket_name: str, files: dict
+    authentication_header: dict,
+    bucket_name: str,
+    file_name: str,
+    file,
+    md5: str = None
 ) -> dict:
+    """Stream the file to the backend as the raw request body."""
     url = f"{base_url}/s3/upload"
     try:
-        response = requests.post(
+        response = session.post(
             url,
-            headers=authentication_header,
-            data={"bucket_name": bucket_name},
-            files=files
+            headers={
+                **authentication_header,
+                "Content-Type": "application/octet-stream"
+            },
+            params={
+                "bucket_name": bucket_name,
+                "file_name": file_name,
+                "md5": md5
+            },
+            data=file
         )
         data = response.json()
         if response.status_code == 200:
@@ -260,12 +420,181 @@ def send_s3_upload_request(
             raise e
 
 
+def send_s3_presign_upload_request(
+    authentication_header: dict,
+    bucket_name: str,
+    file_name: str,
+    method: str = "put",
+    size: int = None,
+    md5: str = None
+) -> dict:
+    """
+    Get presigned URLs to upload a file directly to S3. The status is
+    "unchanged" if the object already has the content with this MD5.
+    """
+    url = f"{base_url}/s3/presign/upload"
+    try:
+        response = session.post(url, headers=authentication_header, json={
+            "bucket_name": bucket_name,
+            "file_name": file_name,
+            "method": method,
+            "size": size,
+            "md5": md5
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(f"Error requesting S3 upload: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting S3 upload (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
+def send_s3_object_match_request(
+    authentication_header: dict, bucket_name: str, file_name: str, md5: str
+) -> bool:
+    """Check whether the object already has the content with this MD5."""
+    url = f"{base_url}/s3/object/match"
+    try:
+        response = session.post(url, headers=authentication_header, json={
+            "bucket_name": bucket_name,
+            "file_name": file_name,
+            "md5": md5
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data.get("unchanged", False)
+        else:
+            typer.echo(f"Error requesting S3 upload: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting S3 upload (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
+def send_s3_presign_complete_request(
+    authentication_header: dict,
+    bucket_name: str,
+    file_name: str,
+    upload_id: str,
+    parts: list[dict]
+) -> dict:
+    url = f"{base_url}/s3/presign/complete"
+    try:
+        response = session.post(url, headers=authentication_header, json={
+            "bucket_name": bucket_name,
+            "file_name": file_name,
+            "upload_id": upload_id,
+            "parts": parts
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(
+                f"Error completing S3 upload: {data.get('detail')}"
+            )
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error completing S3 upload (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
+def send_s3_presign_abort_request(
+    authentication_header: dict,
+    bucket_name: str,
+    file_name: str,
+    upload_id: str
+) -> dict:
+    """
+    Abort a multipart upload. Raises an exception if it couldn't be
+    aborted, for the caller to report along with the upload's own error.
+    """
+    url = f"{base_url}/s3/presign/abort"
+    response = session.post(url, headers=authentication_header, json={
+        "bucket_name": bucket_name,
+        "file_name": file_name,
+        "upload_id": upload_id
+    })
+    if response.status_code == 200:
+        return response.json()
+    raise Exception(response.json().get("detail"))
+
+
+def send_s3_presign_download_request(
+    authentication_header: dict, bucket_name: str, file_name: str
+) -> dict:
+    """Get a presigned URL to download a file directly from S3."""
+    url = f"{base_url}/s3/presign/download"
+    try:
+        response = session.get(url, headers=authentication_header, params={
+            "bucket_name": bucket_name,
+            "file_name": file_name
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(f"Error requesting S3 download: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting S3 download (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
+def send_s3_sync_plan_request(
+    authentication_header: dict,
+    bucket_name: str,
+    prefix: str,
+    files: list[dict]
+) -> dict:
+    """Ask the backend which local files are new or changed in the bucket."""
+    url = f"{base_url}/s3/sync/plan"
+    try:
+        response = session.post(url, headers=authentication_header, json={
+            "bucket_name": bucket_name,
+            "prefix": prefix,
+            "files": files
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(f"Error requesting S3 sync plan: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting S3 sync plan (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
 def send_dns_zone_create_request(
     authentication_header: dict, zone_name: str
 ) -> dict:
     url = f"{base_url}/route53/zone/create"
     try:
-        response = requests.post(url, headers=authentication_header, json={
+        response = session.post(url, headers=authentication_header, json={
             "zone_name": zone_name
         })
         data = response.json()
@@ -285,13 +614,19 @@ def send_dns_zone_create_request(
             raise e
 
 def send_dns_zone_delete_request(
-    authentication_header: dict, zone: str
+    authentication_header: dict, zone: str, force: bool = False
 ) -> dict:
+    """
+    Delete a DNS zone. With force, its records are deleted first, and the
+    response is the background job doing it.
+    """
     url = f"{base_url}/route53/zone/{zone}/delete"
     try:
-        response = requests.delete(url, headers=authentication_header)
+        response = session.delete(
+            url, headers=authentication_header, params={"force": force}
+        )
         data = response.json()
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             return data
         else:
             typer.echo(f"Error deleting DNS zone: {data.get('detail')}")
@@ -307,7 +642,7 @@ def send_dns_zone_delete_request(
 def send_dns_zone_list_request(authentication_header: dict) -> dict:
     url = f"{base_url}/route53/zones"
     try:
-        response = requests.get(url, headers=authentication_header)
+        response = session.get(url, headers=authentication_header)
         data = response.json()
         if response.status_code == 200:
             return data
@@ -317,3 +652,113 @@ def send_dns_zone_list_request(authentication_header: dict) -> dict:
             raise typer.Exit()
     except Exception as e:
         raise e
+
+
+def send_dns_records_change_request(
+    authentication_header: dict, zone: str, action: str, records: list[dict]
+) -> dict:
+    """Create, upsert or delete DNS records, in as few batches as possible."""
+    url = f"{base_url}/route53/zone/{zone}/records/{action}"
+    try:
+        response = session.post(url, headers=authentication_header, json={
+            "records": records
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(f"Error changing DNS records: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error changing DNS records (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
+def send_dns_zone_sync_request(
+    authentication_header: dict,
+    zone: str,
+    records: list[dict],
+    dry_run: bool = False
+) -> dict:
+    """Make the zone's records match the given ones."""
+    url = f"{base_url}/route53/zone/{zone}/sync"
+    try:
+        response = session.post(url, headers=authentication_header, json={
+            "records": records,
+            "dry_run": dry_run
+        })
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(f"Error syncing DNS zone: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error syncing DNS zone (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+
+def send_job_status_request(authentication_header: dict, job_id: str) -> dict:
+    url = f"{base_url}/jobs/{job_id}"
+    try:
+        response = session.get(url, headers=authentication_header)
+        data = response.json()
+        if response.status_code == 200:
+            return data
+        else:
+            typer.echo(f"Error requesting job status: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting job status (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+def send_job_list_request(authentication_header: dict) -> dict:
+    url = f"{base_url}/jobs"
+    try:
+        response = session.get(url, headers=authentication_header)
+        data = response.json()
+        if response.status_code == 200:
+            return data.get("jobs", [])
+        else:
+            typer.echo(f"Error requesting job list: {data.get('detail')}")
+            typer.echo(f"HTTP Status code: {response.status_code}")
+            raise typer.Exit()
+    except Exception as e:
+        if not isinstance(e, typer.Exit):
+            typer.echo(f"Error requesting job list (client side): {e}")
+            raise typer.Exit()
+        else:
+            raise e
+
+def wait_for_job(
+    authentication_header: dict, job_id: str, poll_interval: float = 2
+) -> dict:
+    """
+    Poll a background job until it finishes, printing its progress along
+    the way. Returns the job's result, or exits if the job failed.
+    """
+    last_progress = ""
+    while True:
+        job = send_job_status_request(authentication_header, job_id)
+        if job.get("status") == "succeeded":
+            return job.get("result") or {}
+        if job.get("status") == "failed":
+            typer.echo(f"Job {job_id} failed: {job.get('error')}")
+            raise typer.Exit()
+        progress = job.get("progress")
+        if progress and progress != last_progress:
+            typer.echo(f"{progress}...")
+            last_progress = progress
+        time.sleep(poll_interval)
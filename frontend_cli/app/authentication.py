@@ -5,7 +5,8 @@ from typing import Optional
 import typer
 from app import config
 import requests
-from app.api_requests import send_login_request
+from datetime import datetime, timedelta, timezone
+from app.api_requests import send_login_request, send_logout_request
 
 def save_login_token(token: str, username: str):
     os.environ[config.TOKEN_ENV_VAR] = token
@@ -36,6 +37,7 @@ def logout():
     os.environ.pop(config.TOKEN_ENV_VAR, None)
     os.environ.pop(config.USER_ENV_VAR, None)
     config.save_login_token("")
+    config.save_refresh_token("")
     config.save_username("")
     if os.path.exists(config.LOCAL_USER_PERMISSIONS_FILE):
         os.remove(config.LOCAL_USER_PERMISSIONS_FILE)
@@ -43,21 +45,83 @@ def logout():
         os.remove(config.LOCAL_TOKEN_EXPIRATION_FILE)
 
 
-def refresh_token_request(token: str) -> str:
-    """Call the backend to refresh the token."""
+def revoke_session():
+    """
+    Revoke the saved tokens on the backend, so they can't be used even if
+    they were copied. The local session is cleared by logout() either way.
+    """
+    token = config.read_login_token()
+    refresh_token = config.read_refresh_token()
+    if not token and not refresh_token:
+        return
+    # The refresh token is enough on its own, so the session is revoked
+    # even when the access token already expired
+    authentication_header = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        send_logout_request(authentication_header, refresh_token)
+    except Exception as e:
+        typer.echo(f"Could not revoke the session on the backend: {e}")
+
+def refresh_token_request(refresh_token: str) -> dict:
+    """
+    Exchange the refresh token for new access and refresh tokens. Returns
+    an empty dict if the backend refused it.
+    """
     url = f"{config.BACKEND_URL}/auth/refresh"
-    headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.post(url, headers=headers)
+        response = requests.post(url, json={"refresh_token": refresh_token})
         if response.status_code == 200:
-            data = response.json()
-            return data.get("access_token", "")
-        else:
-            typer.echo(f"Token refresh failed: {response.text}")
-            return ""
+            return response.json()
+        return {}
     except Exception as e:
         typer.echo(f"Error during token refresh: {e}")
-        return ""
+        return {}
+
+def save_login_response(login_response: dict, user: str) -> str:
+    """Save the tokens and permissions of a login or refresh response."""
+    token = login_response.get("access_token")
+    save_login_token(token, user)
+    config.save_refresh_token(login_response.get("refresh_token") or "")
+    user_permissions = login_response.get("user_permissions")
+    token_expires_at = login_response.get("expires_at_utc")
+    if user_permissions: config.save_user_permissions(user_permissions)
+    if token_expires_at: config.save_token_expiration(token_expires_at)
+    return token
+
+def token_expires_within(seconds: float) -> bool:
+    expiration = config.read_token_expiration()
+    if not expiration:
+        return False
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds) >= expiration
+
+def refresh_saved_token(stale_token: str = None) -> str:
+    """
+    Replace the saved token with a new one, using the saved refresh token.
+    Returns the new token, or "" if it couldn't be refreshed.
+    Processes refreshing at the same time take turns: the ones that waited
+    find the token another one saved, and use it instead of refreshing
+    with a refresh token that was already used.
+    With the stale_token the backend rejected, it's refreshed even if it
+    isn't about to expire, unless another process already replaced it.
+    """
+    with config.saved_tokens_lock():
+        token = config.read_login_token()
+        if token != stale_token and not token_expires_within(
+            config.TOKEN_REFRESH_MARGIN_SECONDS
+        ):
+            if token:
+                os.environ[config.TOKEN_ENV_VAR] = token
+            return token
+        refresh_token = config.read_refresh_token()
+        if not refresh_token:
+            return ""
+        login_response = refresh_token_request(refresh_token)
+        if not login_response.get("access_token"):
+            # Refresh tokens can only be used once, don't retry this one
+            config.save_refresh_token("")
+            return ""
+        user = os.environ.get(config.USER_ENV_VAR) or config.read_username()
+        return save_login_response(login_response, user)
 
 def prompt_for_credentials_and_login(user=None, one_time=False) -> str:
     """
@@ -70,15 +134,10 @@ def prompt_for_credentials_and_login(user=None, one_time=False) -> str:
     password = getpass.getpass("Enter your password: ")
     typer.echo(f"Logging in as {user}...")
     login_response = send_login_request(user, password)
-    token = login_response.get("access_token")
-    token_expires_at = login_response.get("expires_at_utc")
-    user_permissions = login_response.get("user_permissions")
-    if token:
-        save_login_token(token, user)
+    if login_response.get("access_token"):
+        token = save_login_response(login_response, user)
         if not one_time:
             config.save_username(user)
-        if user_permissions: config.save_user_permissions(user_permissions)
-        if token_expires_at: config.save_token_expiration(token_expires_at)
         typer.echo("Login successful!")
         return token
     else:
@@ -87,6 +146,15 @@ def prompt_for_credentials_and_login(user=None, one_time=False) -> str:
 
 def generate_authentication_header():
     token = get_saved_token()
+    # Refresh the saved token shortly before it expires, so commands never
+    # need a full login mid-session (tokens given through the environment
+    # are used as they are)
+    if token and token == config.read_login_token() and token_expires_within(
+        config.TOKEN_REFRESH_MARGIN_SECONDS
+    ):
+        token = refresh_saved_token() or (
+            "" if token_expires_within(0) else token
+        )
     if token:
         return {"Authorization": f"Bearer {token}"}
     else:
@@ -1,5 +1,6 @@
 import os
 import json
+from contextlib import contextmanager
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -9,6 +10,14 @@ BACKEND_URL = "http://localhost:8000"
 TOKEN_ENV_VAR = "RESOURSPHERE_TOKEN"
 USER_ENV_VAR = "RESOURSPHERE_USER"
 LOCAL_CONFIG_DIR = os.path.expanduser("~/resoursphere")
+# Files larger than this are uploaded to S3 in parts
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+# Parallel transfers to/from S3 (parts of one file)
+S3_TRANSFER_WORKERS = 4
+# Files uploaded in parallel by "s3 sync"
+S3_SYNC_WORKERS = 8
+# The access token is refreshed when it expires in less than this
+TOKEN_REFRESH_MARGIN_SECONDS = 120
 # PASSWORD_ENV_VAR = "RESOURSPHERE_PASSWORD"
 def get_local_config_dir():
     os.makedirs(LOCAL_CONFIG_DIR, exist_ok=True)
@@ -21,6 +30,8 @@ def get_local_temp_dir():
 
 LOCAL_USER_FILE = os.path.join(get_local_config_dir(), ".user")
 LOCAL_TOKEN_FILE = os.path.join(get_local_temp_dir(), ".token")
+LOCAL_REFRESH_TOKEN_FILE = os.path.join(get_local_temp_dir(), ".refresh_token")
+LOCAL_TOKEN_LOCK_FILE = os.path.join(get_local_temp_dir(), ".token.lock")
 LOCAL_USER_PERMISSIONS_FILE = os.path.join(
     get_local_config_dir(), ".permissions"
     )
@@ -44,6 +55,38 @@ def read_login_token() -> str:
             return token_file.read().strip()
     return ""
 
+def save_refresh_token(token: str):
+    with open(LOCAL_REFRESH_TOKEN_FILE, "w") as token_file:
+        token_file.write(token)
+
+def read_refresh_token() -> str:
+    if os.path.exists(LOCAL_REFRESH_TOKEN_FILE):
+        with open(LOCAL_REFRESH_TOKEN_FILE, "r") as token_file:
+            return token_file.read().strip()
+    return ""
+
+@contextmanager
+def saved_tokens_lock():
+    """
+    Hold an exclusive lock on the saved tokens, so only one CLI process
+    at a time refreshes them (each refresh token can only be used once)
+    """
+    with open(LOCAL_TOKEN_LOCK_FILE, "a") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 def save_username(user: str):
     with open(LOCAL_USER_FILE, "w") as user_file:
         user_file.write(user)
@@ -71,4 +114,7 @@ def save_token_expiration(expiration: datetime):
 def read_token_expiration() -> datetime:
     if os.path.exists(LOCAL_TOKEN_EXPIRATION_FILE):
         with open(LOCAL_TOKEN_EXPIRATION_FILE, "r") as token_expiration_file:
-            return datetime.fromisoformat(token_expiration_file.read().strip())
\ No newline at end of file
+            expiration = token_expiration_file.read().strip()
+            # fromisoformat only accepts the "Z" suffix from Python 3.11
+            return datetime.fromisoformat(expiration.replace("Z", "+00:00"))
+    return None
\ No newline at end of file
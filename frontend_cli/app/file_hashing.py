@@ -0,0 +1,15 @@
+import hashlib
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_md5(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    MD5 of a file's content as a hex string. The file is read in chunks, so
+    files of any size are hashed in constant memory.
+    """
+    md5 = hashlib.md5()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            md5.update(chunk)
+    return md5.hexdigest()
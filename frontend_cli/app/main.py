@@ -6,6 +6,7 @@ from app.subcommands.debug import debug_cmd
 from app.subcommands.ec2 import ec2_cmd
 from app.subcommands.s3 import s3_cmd
 from app.subcommands.dns_zone import dns_zone_cmd
+from app.subcommands.jobs import jobs_cmd
 from app.authentication import get_saved_token, get_logged_in_user
 from app import config
 
@@ -16,6 +17,7 @@ resoursphere_cmd.add_typer(debug_cmd, name="debug")
 resoursphere_cmd.add_typer(ec2_cmd, name="ec2")
 resoursphere_cmd.add_typer(s3_cmd, name="s3")
 resoursphere_cmd.add_typer(dns_zone_cmd, name="dns-zone")
+resoursphere_cmd.add_typer(jobs_cmd, name="jobs")
 
 @resoursphere_cmd.callback(invoke_without_command=True)
 def main(ctx: typer.Context):
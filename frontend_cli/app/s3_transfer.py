@@ -0,0 +1,172 @@
+import os
+import requests
+import typer
+from concurrent.futures import ThreadPoolExecutor
+from app import config
+from app.file_hashing import compute_md5
+from app.api_requests import (
+    send_s3_presign_upload_request,
+    send_s3_presign_complete_request,
+    send_s3_presign_abort_request,
+    send_s3_presign_download_request
+)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class S3TransferError(Exception):
+    def __init__(self, message: str, abort_warning: str = None):
+        super().__init__(message)
+        # Set when the failed multipart upload couldn't be aborted either
+        self.abort_warning = abort_warning
+
+
+def _check_s3_response(response: requests.Response):
+    if not response.ok:
+        raise S3TransferError(
+            f"S3 returned HTTP {response.status_code}: {response.text}"
+        )
+
+
+def _upload_part(path: str, url: str, offset: int, length: int) -> str:
+    """Upload one part of the file, and return its ETag."""
+    with open(path, "rb") as file:
+        file.seek(offset)
+        data = file.read(length)
+    try:
+        response = requests.put(url, data=data)
+    except requests.RequestException as e:
+        raise S3TransferError(f"Uploading a part failed: {e}")
+    _check_s3_response(response)
+    return response.headers["ETag"]
+
+
+def upload_file(
+    authentication_header: dict,
+    bucket_name: str,
+    path: str,
+    file_name: str = None,
+    show_progress: bool = True
+) -> dict:
+    """
+    Upload a file directly to S3 with presigned URLs from the backend, so
+    the data never goes through the backend. The file's MD5 is sent first,
+    and nothing is uploaded if the object already has the same content
+    (the returned status is then "unchanged").
+    Files larger than S3_MULTIPART_THRESHOLD are uploaded in parts,
+    S3_TRANSFER_WORKERS at a time, each read from the file only when it's
+    sent. A failed multipart upload is aborted.
+    """
+    file_name = file_name or os.path.basename(path)
+    size = os.path.getsize(path)
+    md5 = compute_md5(path)
+    unchanged = {
+        "bucket_name": bucket_name,
+        "file_name": file_name,
+        "status": "unchanged",
+        "size": size
+    }
+
+    if size <= config.S3_MULTIPART_THRESHOLD:
+        presigned = send_s3_presign_upload_request(
+            authentication_header, bucket_name, file_name, md5=md5
+        )
+        if presigned["status"] == "unchanged":
+            return unchanged
+        with open(path, "rb") as file:
+            response = requests.put(
+                presigned["url"], data=file.read(),
+                headers=presigned.get("headers", {})
+            )
+        _check_s3_response(response)
+        return {
+            "bucket_name": bucket_name,
+            "file_name": file_name,
+            "status": "uploaded",
+            "size": size
+        }
+
+    presigned = send_s3_presign_upload_request(
+        authentication_header, bucket_name, file_name, "multipart", size, md5
+    )
+    if presigned["status"] == "unchanged":
+        return unchanged
+    upload_id = presigned["upload_id"]
+    part_size = presigned["part_size"]
+    parts = presigned["parts"]
+    executor = ThreadPoolExecutor(max_workers=config.S3_TRANSFER_WORKERS)
+    try:
+        futures = [
+            executor.submit(
+                _upload_part, path, part["url"],
+                (part["part_number"] - 1) * part_size, part_size
+            )
+            for part in parts
+        ]
+        uploaded_parts = []
+        for part, future in zip(parts, futures):
+            uploaded_parts.append({
+                "part_number": part["part_number"],
+                "etag": future.result()
+            })
+            if show_progress:
+                typer.echo(
+                    f"Uploaded part {part['part_number']}/{len(parts)}"
+                )
+    except BaseException as e:
+        # Skip the parts that didn't start, and let the ones in flight
+        # finish so they can't be stored after the abort
+        executor.shutdown(wait=True, cancel_futures=True)
+        try:
+            send_s3_presign_abort_request(
+                authentication_header, bucket_name, file_name, upload_id
+            )
+        except Exception as abort_error:
+            # The upload's own error is the one to report, the abort
+            # failure comes with it as a warning
+            warning = (
+                f"The multipart upload {upload_id} couldn't be aborted "
+                f"({abort_error}), so its parts are still stored"
+            )
+            if isinstance(e, S3TransferError):
+                e.abort_warning = warning
+            else:
+                typer.echo(f"Warning: {warning}")
+        raise
+    finally:
+        executor.shutdown()
+
+    result = send_s3_presign_complete_request(
+        authentication_header, bucket_name, file_name, upload_id,
+        uploaded_parts
+    )
+    return {**result, "size": size}
+
+
+def download_file(
+    authentication_header: dict,
+    bucket_name: str,
+    file_name: str,
+    path: str
+) -> int:
+    """
+    Download a file directly from S3 with a presigned URL, streaming it to
+    disk. Returns the number of bytes written.
+    """
+    presigned = send_s3_presign_download_request(
+        authentication_header, bucket_name, file_name
+    )
+    temp_path = f"{path}.part"
+    size = 0
+    try:
+        with requests.get(presigned["url"], stream=True) as response:
+            _check_s3_response(response)
+            with open(temp_path, "wb") as file:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+                    size += len(chunk)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return size
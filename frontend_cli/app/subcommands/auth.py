@@ -4,6 +4,7 @@ from app.authentication import (
     send_login_request,
     refresh_token_request,
     prompt_for_credentials_and_login,
+    revoke_session,
     logout,
     # whoami_request,
 )
@@ -60,9 +61,12 @@ def login_cmd(
 @auth_cmd.command("logout")
 def logout_cmd():
     """
-    Log out and clear stored credentials.
+    Log out: revoke the session's tokens on the backend, and clear stored
+    credentials.
     """
+    revoke_session()
     logout()
+    typer.echo("Logged out successfully.")
     # os.environ.pop("RESOURSPHERE_TOKEN", None)
     # os.environ.pop("RESOURSPHERE_USER", None)
     # if os.path.exists(config.LOCAL_USER_FILE):
@@ -8,8 +8,12 @@ import getpass
 from app.api_requests import (
     send_dns_zone_create_request,
     send_dns_zone_delete_request,
-    send_dns_zone_list_request
+    send_dns_zone_list_request,
+    send_dns_records_change_request,
+    send_dns_zone_sync_request,
+    wait_for_job
 )
+from app.zone_file import parse_zone_file, is_zone_apex_record, ZoneFileError
 
 dns_zone_cmd = typer.Typer()
 
@@ -37,12 +41,32 @@ def zone_create_cmd(
 def zone_delete_cmd(
     zone: str = typer.Argument(
         ..., help="Name or Zone ID of the DNS zone to delete"
+    ),
+    force: bool = typer.Option(
+        False, "--force", "-f", help="Delete all the records in the zone too"
+    ),
+    yes: bool = typer.Option(
+        False, "--yes", "-y", help="Don't ask for confirmation with --force"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
     )
 ):
     authentication_header = generate_authentication_header()
+    if force and not yes:
+        typer.confirm(
+            f"Delete DNS zone '{zone}' and ALL the records in it?", abort=True
+        )
     result = send_dns_zone_delete_request(
-        authentication_header, zone
+        authentication_header, zone, force
     )
+    if force:
+        if no_wait:
+            typer.echo(f"Job {result.get('job_id')} submitted. Track it with "
+                       f"'resoursphere jobs status {result.get('job_id')}'")
+            return
+        result = wait_for_job(authentication_header, result.get("job_id"))
+        typer.echo(f"Deleted {result.get('deleted_records')} record set(s).")
     typer.echo(f"DNS zone '{result.get('zone_id')}' deleted successfully.")
 
 
@@ -89,3 +113,127 @@ def zone_list_cmd():
             f"{zone.get('name', 'N/A'):<{zone_name_width}} "
             f"{zone.get('record_count', 0):<{records_width}}"
         )
+
+
+def read_zone_file(zone_file: str, origin: str) -> list[dict]:
+    """
+    Read the record sets of a zone file, without the apex SOA and NS
+    records, which Route53 manages
+    """
+    try:
+        with open(zone_file, "r") as file:
+            records = parse_zone_file(file.read(), origin)
+    except (OSError, ZoneFileError) as e:
+        typer.echo(f"Error reading zone file {zone_file}: {e}")
+        raise typer.Exit(code=1)
+    return [
+        record for record in records
+        if not is_zone_apex_record(record, origin)
+    ]
+
+
+def resolve_zone_name(authentication_header: dict, zone: str) -> str:
+    """
+    The name of the zone given by name or by ID, to qualify the relative
+    names of a zone file with
+    """
+    zones = send_dns_zone_list_request(authentication_header).get("zones", [])
+    for listed_zone in zones:
+        if listed_zone.get("zone_id") == zone:
+            return listed_zone["name"]
+    return zone
+
+
+def format_record(record: dict) -> str:
+    if "alias" in record:
+        return f"{record['name']} {record['type']} " \
+            f"ALIAS {record['alias']['dns_name']}"
+    return f"{record['name']} {record['type']} {record.get('ttl')} " \
+        f"{' | '.join(record['values'])}"
+
+
+@dns_zone_cmd.command("import")
+def zone_import_cmd(
+    zone: str = typer.Argument(
+        ..., help="Name or Zone ID of the DNS zone to import into"
+    ),
+    zone_file: str = typer.Argument(..., help="Path of a BIND zone file"),
+    origin: Optional[str] = typer.Option(
+        None, "--origin", "-o",
+        help="Origin of the relative names in the file, when it has no "
+        "$ORIGIN (default: the zone name)"
+    )
+):
+    """
+    Import the records of a BIND zone file into a DNS zone. Records that
+    already exist are replaced. The SOA and NS records of the zone apex are
+    skipped, as Route53 manages them.
+    """
+    authentication_header = generate_authentication_header()
+    origin = origin or resolve_zone_name(authentication_header, zone)
+    records = read_zone_file(zone_file, origin)
+    if not records:
+        typer.echo("No records to import.")
+        return
+    result = send_dns_records_change_request(
+        authentication_header, zone, "upsert", records
+    )
+    typer.echo(
+        f"Imported {len(records)} record sets into DNS zone "
+        f"'{result.get('zone_id')}' in {result.get('batches')} "
+        "change batch(es)."
+    )
+
+
+@dns_zone_cmd.command("sync")
+def zone_sync_cmd(
+    zone: str = typer.Argument(
+        ..., help="Name or Zone ID of the DNS zone to sync"
+    ),
+    zone_file: str = typer.Argument(
+        ..., help="Path of a BIND zone file with the desired records"
+    ),
+    origin: Optional[str] = typer.Option(
+        None, "--origin", "-o",
+        help="Origin of the relative names in the file, when it has no "
+        "$ORIGIN (default: the zone name)"
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only show the changes"
+    )
+):
+    """
+    Make a DNS zone's records match a BIND zone file: create the missing
+    records, update the different ones and delete the ones that aren't in
+    the file. Only the differences are sent to Route53.
+    """
+    authentication_header = generate_authentication_header()
+    origin = origin or resolve_zone_name(authentication_header, zone)
+    records = read_zone_file(zone_file, origin)
+    result = send_dns_zone_sync_request(
+        authentication_header, zone, records, dry_run
+    )
+
+    for record in result["delete"]:
+        typer.echo(f"- {format_record(record)}")
+    for record in result["upsert"]:
+        typer.echo(f"~ {format_record(record['current'])}")
+        typer.echo(f"  -> {format_record(record)}")
+    for record in result["create"]:
+        typer.echo(f"+ {format_record(record)}")
+    counts = (
+        len(result['create']), len(result['upsert']), len(result['delete'])
+    )
+    if dry_run:
+        typer.echo(
+            "Dry run: {} to create, {} to update, {} to delete. "
+            "Nothing was changed.".format(*counts)
+        )
+    elif result["batches"]:
+        typer.echo(
+            f"DNS zone '{result['zone_id']}' synced: "
+            "{} created, {} updated, {} deleted".format(*counts)
+            + f", in {result['batches']} change batch(es)."
+        )
+    else:
+        typer.echo(f"DNS zone '{result['zone_id']}' is already in sync.")
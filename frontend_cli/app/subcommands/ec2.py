@@ -9,10 +9,11 @@ import os
 import getpass
 from app.api_requests import (
     send_ec2_create_request,
-    send_ec2_list_request,
+    stream_ec2_list_request,
     send_ec2_delete_request,
     send_ec2_start_request,
-    send_ec2_stop_request
+    send_ec2_stop_request,
+    wait_for_job
 )
 
 ec2_cmd = typer.Typer()
@@ -22,7 +23,18 @@ ec2_cmd = typer.Typer()
 def ec2_createt_cmd(
     ami: Optional[str] = typer.Option(None, "--ami", help="AMI ID or name"),
     instance_type: Optional[str] = typer.Option(None, "--type", "-t", help="EC2 instance type"),
-    name: Optional[str] = typer.Option(None, "--name", "-n", help="Name for the EC2 instance")
+    name: Optional[str] = typer.Option(None, "--name", "-n", help="Name for the EC2 instance"),
+    region: Optional[str] = typer.Option(
+        None, "--region", "-r",
+        help="AWS region to launch in (defaults to the backend's default region)"
+    ),
+    count: int = typer.Option(
+        1, "--count", "-c", min=1,
+        help="Number of instances to launch (named <name>-1, <name>-2, ...)"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
+    )
 ):
     authentication_header = generate_authentication_header()
 
@@ -50,65 +62,132 @@ def ec2_createt_cmd(
     if name is None:
         name = typer.prompt("Enter a name for the EC2 instance")
     
-    typer.echo("Launching EC2 instance...")
-    response = send_ec2_create_request(
-        authentication_header, ami, instance_type, name
+    typer.echo(f"Launching {count} EC2 instance(s)...")
+    job = send_ec2_create_request(
+        authentication_header, ami, instance_type, name, region, count
     )
+    if no_wait:
+        typer.echo(f"Launch job {job.get('job_id')} submitted. Track it with "
+                   f"'resoursphere jobs status {job.get('job_id')}'")
+        return
 
-    typer.echo(f"EC2 instance {response.get('instance_id')} created successfully.")
-    typer.echo(f"Public IP: {response.get('instance_public_ip')}")
+    response = wait_for_job(authentication_header, job.get("job_id"))
+    for instance in response.get("instances", []):
+        typer.echo(
+            f"EC2 instance {instance.get('name')} "
+            f"({instance.get('instance_id')}) created successfully."
+        )
+        typer.echo(f"Public IP: {instance.get('public_ip')}")
+    typer.echo(f"Region: {response.get('region')}")
 
 @ec2_cmd.command("list")
-def ec2_list_cmd():
+def ec2_list_cmd(
+    state: Optional[str] = typer.Option(
+        None, "--state", "-s", help="Only list instances in this state"
+    ),
+    name_prefix: Optional[str] = typer.Option(
+        None, "--name-prefix", "-p",
+        help="Only list instances whose name starts with this prefix"
+    ),
+    limit: Optional[int] = typer.Option(
+        None, "--limit", "-l", min=1,
+        help="Maximum number of instances to list"
+    ),
+    region: Optional[str] = typer.Option(
+        None, "--region", "-r",
+        help="Only list instances in this region (defaults to all regions)"
+    )
+):
     authentication_header = generate_authentication_header()
     typer.echo(f"Requesting EC2 instances list...")
-    response = send_ec2_list_request(authentication_header)
     typer.echo(f"EC2 instances for user {get_logged_in_user()}:")
-    table_data = [
-        ["Name", "Instance ID", "Public IP Address", "State"]
-    ]
-    for instance in response:
-        table_data.append([
+    # Rows are printed as they arrive, so the columns have fixed widths
+    column_widths = [24, 19, 17, 13, 14]
+    header = ["Name", "Instance ID", "Public IP Address", "State", "Region"]
+    typer.echo(" | ".join(
+        f"{item:<{width}}" for item, width in zip(header, column_widths)
+    ))
+    typer.echo("-+-".join("-" * width for width in column_widths))
+
+    for instance in stream_ec2_list_request(
+        authentication_header, state, name_prefix, limit, region
+    ):
+        row = [
             instance.get('name'),
             instance.get('instance_id'),
             instance.get('public_ip'),
-            instance.get('state')
-        ])
-    
-    column_widths = [
-        max(len(str(item)) for item in column) for column in zip(*table_data)
-    ]
-    table = ""
-    for row in table_data:
-        table += " | ".join(f"{item:<{width}}" for item, width in zip(row, column_widths)) + "\n"
-        if row == table_data[0]:
-            table += "-+-".join("-" * width for width in column_widths) + "\n"
-    
-    typer.echo(table)
+            instance.get('state'),
+            instance.get('region')
+        ]
+        typer.echo(" | ".join(
+            f"{item:<{width}}" for item, width in zip(row, column_widths)
+        ))
+
+def print_instance_results(response: dict, action: str):
+    for result in response.get("instances", []):
+        instance = result.get("instance_id") or result.get("instance")
+        typer.echo(f"{instance}: {result.get('status')}")
+    typer.echo(
+        f"{response.get('succeeded')} instance(s) {action} successfully, "
+        f"{response.get('failed')} failed or skipped."
+    )
 
 @ec2_cmd.command("delete")
 def ec2_delete_cmd(
-    instance: str = typer.Argument(..., help="Name or ID of the instance to delete")
+    instances: list[str] = typer.Argument(
+        ..., help="Names or IDs of the instances to delete"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
+    )
 ):
     authentication_header = generate_authentication_header()
-    typer.echo(f"Requesting deletion of EC2 instance {instance}...")
-    response = send_ec2_delete_request(authentication_header, instance)
-    typer.echo(response)
+    typer.echo(f"Requesting deletion of EC2 instance(s) {', '.join(instances)}...")
+    job = send_ec2_delete_request(authentication_header, instances)
+    if no_wait:
+        typer.echo(f"Job {job.get('job_id')} submitted. Track it with "
+                   f"'resoursphere jobs status {job.get('job_id')}'")
+        return
+
+    response = wait_for_job(authentication_header, job.get("job_id"))
+    print_instance_results(response, "terminated")
 
 @ec2_cmd.command("start")
 def ec2_start_cmd(
-    instance: str = typer.Argument(..., help="Name or ID of the instance to start")
+    instances: list[str] = typer.Argument(
+        ..., help="Names or IDs of the instances to start"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
+    )
 ):
     authentication_header = generate_authentication_header()
-    typer.echo(f"Requesting to start EC2 instance {instance}...")
-    response = send_ec2_start_request(authentication_header, instance)
-    typer.echo(response)
+    typer.echo(f"Requesting to start EC2 instance(s) {', '.join(instances)}...")
+    job = send_ec2_start_request(authentication_header, instances)
+    if no_wait:
+        typer.echo(f"Job {job.get('job_id')} submitted. Track it with "
+                   f"'resoursphere jobs status {job.get('job_id')}'")
+        return
+
+    response = wait_for_job(authentication_header, job.get("job_id"))
+    print_instance_results(response, "started")
 
 @ec2_cmd.command("stop")
 def ec2_stop_cmd(
-    instance: str = typer.Argument(..., help="Name or ID of the instance to stop")
+    instances: list[str] = typer.Argument(
+        ..., help="Names or IDs of the instances to stop"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
+    )
 ):
     authentication_header = generate_authentication_header()
-    typer.echo(f"Requesting to stop EC2 instance {instance}...")
-    response = send_ec2_stop_request(authentication_header, instance)
-    typer.echo(response)
\ No newline at end of file
+    typer.echo(f"Requesting to stop EC2 instance(s) {', '.join(instances)}...")
+    job = send_ec2_stop_request(authentication_header, instances)
+    if no_wait:
+        typer.echo(f"Job {job.get('job_id')} submitted. Track it with "
+                   f"'resoursphere jobs status {job.get('job_id')}'")
+        return
+
+    response = wait_for_job(authentication_header, job.get("job_id"))
+    print_instance_results(response, "stopped")
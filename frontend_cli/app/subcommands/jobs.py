@@ -0,0 +1,66 @@
+from app.authentication import generate_authentication_header
+from app.api_requests import (
+    send_job_status_request,
+    send_job_list_request,
+    wait_for_job
+)
+import typer
+
+jobs_cmd = typer.Typer()
+
+
+@jobs_cmd.command("status")
+def job_status_cmd(
+    job_id: str = typer.Argument(..., help="ID of the job"),
+    wait: bool = typer.Option(
+        False, "--wait", "-w", help="Wait for the job to finish"
+    )
+):
+    authentication_header = generate_authentication_header()
+    if wait:
+        result = wait_for_job(authentication_header, job_id)
+        typer.echo(f"Job {job_id} succeeded.")
+        for key, value in result.items():
+            typer.echo(f"{key}: {value}")
+        return
+
+    job = send_job_status_request(authentication_header, job_id)
+    typer.echo(f"Job ID: {job.get('job_id')}")
+    typer.echo(f"Action: {job.get('action')}")
+    typer.echo(f"Status: {job.get('status')}")
+    if job.get("progress"):
+        typer.echo(f"Progress: {job.get('progress')}")
+    if job.get("error"):
+        typer.echo(f"Error: {job.get('error')}")
+    if job.get("result"):
+        for key, value in job.get("result").items():
+            typer.echo(f"{key}: {value}")
+
+
+@jobs_cmd.command("list")
+def job_list_cmd():
+    authentication_header = generate_authentication_header()
+    job_list = send_job_list_request(authentication_header)
+    if not job_list:
+        typer.echo("No jobs found.")
+        return
+
+    table_data = [["Job ID", "Action", "Status", "Progress"]]
+    for job in job_list:
+        table_data.append([
+            job.get('job_id'),
+            job.get('action'),
+            job.get('status'),
+            job.get('progress') or ""
+        ])
+
+    column_widths = [
+        max(len(str(item)) for item in column) for column in zip(*table_data)
+    ]
+    table = ""
+    for row in table_data:
+        table += " | ".join(f"{item:<{width}}" for item, width in zip(row, column_widths)) + "\n"
+        if row == table_data[0]:
+            table += "-+-".join("-" * width for width in column_widths) + "\n"
+
+    typer.echo(table)
@@ -1,10 +1,15 @@
 from app.api_requests import (
     send_s3_create_request, send_s3_list_request, send_s3_delete_request,
-    send_s3_upload_request
+    send_s3_upload_request, send_s3_sync_plan_request,
+    send_s3_object_match_request, stream_s3_objects_request, wait_for_job
 )
 from app.authentication import generate_authentication_header
+from app.s3_transfer import upload_file, download_file, S3TransferError
+from app.file_hashing import compute_md5
 import typer
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app import config
 import os
 
 
@@ -18,6 +23,14 @@ def s3_create_cmd(
     ),
     public: Optional[bool] = typer.Option(
         False, "--public", help="Make the bucket publicly accessible"
+    ),
+    region: Optional[str] = typer.Option(
+        None, "--region", "-r",
+        help="AWS region to create the bucket in (defaults to the backend's "
+        "default region)"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
     )
 ):
     authentication_header = generate_authentication_header()
@@ -30,9 +43,15 @@ def s3_create_cmd(
             "Are you sure you want to make the bucket publicly accessible?"
         )
     typer.echo(f"Requesting creation of bucket '{name}'...")
-    response = send_s3_create_request(authentication_header, name, public)
+    job = send_s3_create_request(authentication_header, name, public, region)
+    if no_wait:
+        typer.echo(f"Job {job.get('job_id')} submitted. Track it with "
+                   f"'resoursphere jobs status {job.get('job_id')}'")
+        return
+
+    response = wait_for_job(authentication_header, job.get("job_id"))
     typer.echo(f"Bucket {response.get('bucket_name')} created successfully.")
-    typer.echo(f"Bucket's URL: {response.get('url')}")
+    typer.echo(f"Bucket's URL: {response.get('bucket_url')}")
 
 @s3_cmd.command("list")
 def s3_list_cmd():
@@ -56,11 +75,34 @@ def s3_list_cmd():
 
 @s3_cmd.command("delete")
 def s3_delete_cmd(
-    bucket_name: str = typer.Argument(..., help="Name of the bucket to delete")
+    bucket_name: str = typer.Argument(..., help="Name of the bucket to delete"),
+    force: bool = typer.Option(
+        False, "--force", "-f",
+        help="Delete all the objects in the bucket (and their versions) too"
+    ),
+    yes: bool = typer.Option(
+        False, "--yes", "-y", help="Don't ask for confirmation with --force"
+    ),
+    no_wait: bool = typer.Option(
+        False, "--no-wait", help="Return right after the request is accepted"
+    )
 ):
     authentication_header = generate_authentication_header()
+    if force and not yes:
+        typer.confirm(
+            f"Delete bucket '{bucket_name}' and ALL the objects in it?",
+            abort=True
+        )
     typer.echo(f"Requesting deletion of bucket '{bucket_name}'...")
-    response = send_s3_delete_request(authentication_header, bucket_name)
+    job = send_s3_delete_request(authentication_header, bucket_name, force)
+    if no_wait:
+        typer.echo(f"Job {job.get('job_id')} submitted. Track it with "
+                   f"'resoursphere jobs status {job.get('job_id')}'")
+        return
+
+    response = wait_for_job(authentication_header, job.get("job_id"))
+    if force:
+        typer.echo(f"Deleted {response.get('deleted_objects')} object(s).")
     typer.echo(f"Bucket '{response.get('bucket_name')}' deleted successfully.")
 
 @s3_cmd.command("upload")
@@ -68,15 +110,211 @@ def s3_upload_cmd(
     bucket_name: str = typer.Argument(
         ..., help="Name of the bucket to upload the file to"
     ),
-    file: typer.FileBinaryRead = typer.Argument(
+    path: str = typer.Argument(
         ..., help="Path to the file to upload"
+    ),
+    via_backend: bool = typer.Option(
+        False, "--via-backend",
+        help="Send the file through the backend instead of directly to S3"
     )
 ):
     authentication_header = generate_authentication_header()
-    files = {"file": (os.path.basename(file.name), file)}
+    if not os.path.isfile(path):
+        typer.echo(f"File {path} does not exist.")
+        raise typer.Exit()
     typer.echo(
         f"Uploading file to bucket..."
     )
-    response = send_s3_upload_request(authentication_header, bucket_name, files)
+    if via_backend:
+        file_name = os.path.basename(path)
+        md5 = compute_md5(path)
+        if send_s3_object_match_request(
+            authentication_header, bucket_name, file_name, md5
+        ):
+            response = {"file_name": file_name, "status": "unchanged"}
+        else:
+            with open(path, "rb") as file:
+                response = send_s3_upload_request(
+                    authentication_header, bucket_name, file_name, file, md5
+                )
+    else:
+        try:
+            response = upload_file(authentication_header, bucket_name, path)
+        except S3TransferError as e:
+            typer.echo(f"Error uploading file to S3: {e}")
+            if e.abort_warning:
+                typer.echo(f"Warning: {e.abort_warning}")
+            raise typer.Exit()
+    if response.get("status") == "unchanged":
+        typer.echo(f"File '{response.get('file_name')}' is already up to "
+                   f"date in bucket '{bucket_name}', skipped the upload.")
+        return
     typer.echo(f"File '{response.get('file_name')}' uploaded to bucket "
-               f"'{bucket_name}' successfully.")
\ No newline at end of file
+               f"'{bucket_name}' successfully.")
+
+@s3_cmd.command("download")
+def s3_download_cmd(
+    bucket_name: str = typer.Argument(
+        ..., help="Name of the bucket to download the file from"
+    ),
+    file_name: str = typer.Argument(..., help="Name of the file in the bucket"),
+    output: Optional[str] = typer.Option(
+        None, "--output", "-o",
+        help="Where to save the file (defaults to its name, in the current "
+        "directory)"
+    )
+):
+    authentication_header = generate_authentication_header()
+    output = output or os.path.basename(file_name)
+    typer.echo(f"Downloading file from bucket...")
+    try:
+        size = download_file(
+            authentication_header, bucket_name, file_name, output
+        )
+    except S3TransferError as e:
+        typer.echo(f"Error downloading file from S3: {e}")
+        raise typer.Exit()
+    typer.echo(f"File '{file_name}' ({size} bytes) saved to '{output}'.")
+
+
+def list_local_files(directory: str, prefix: str = "") -> dict[str, dict]:
+    """Map the object key of every file under the directory to its details."""
+    local_files = {}
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            relative_path = os.path.relpath(path, directory)
+            key = prefix + relative_path.replace(os.sep, "/")
+            stat = os.stat(path)
+            local_files[key] = {
+                "path": path,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime
+            }
+    return local_files
+
+@s3_cmd.command("sync")
+def s3_sync_cmd(
+    directory: str = typer.Argument(..., help="Local directory to upload"),
+    bucket_name: str = typer.Argument(..., help="Name of the bucket"),
+    prefix: str = typer.Option(
+        "", "--prefix", "-p", help="Key prefix to upload the files under"
+    ),
+    workers: int = typer.Option(
+        config.S3_SYNC_WORKERS, "--workers", "-w", min=1,
+        help="Number of files to upload in parallel"
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only show what would be uploaded"
+    )
+):
+    """Upload the files in a directory that are new or changed in the bucket."""
+    authentication_header = generate_authentication_header()
+    if not os.path.isdir(directory):
+        typer.echo(f"Directory {directory} does not exist.")
+        raise typer.Exit()
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+
+    local_files = list_local_files(directory, prefix)
+    plan = send_s3_sync_plan_request(
+        authentication_header, bucket_name, prefix, [
+            {"name": key, "size": file["size"], "mtime": file["mtime"]}
+            for key, file in local_files.items()
+        ]
+    )
+    # Files modified since their upload may still have the same content:
+    # hash them, and compare them again by content
+    modified = plan.get("changed", [])
+    if modified:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            md5s = executor.map(
+                compute_md5, [local_files[key]["path"] for key in modified]
+            )
+            files = [
+                {
+                    "name": key,
+                    "size": local_files[key]["size"],
+                    "mtime": local_files[key]["mtime"],
+                    "md5": md5
+                }
+                for key, md5 in zip(modified, md5s)
+            ]
+        content_plan = send_s3_sync_plan_request(
+            authentication_header, bucket_name, prefix, files
+        )
+        plan["changed"] = content_plan.get("changed", [])
+        plan["unchanged"] = plan.get("unchanged", 0) + \
+            content_plan.get("unchanged", 0)
+    to_upload = plan.get("new", []) + plan.get("changed", [])
+    typer.echo(
+        f"{len(plan.get('new', []))} new, {len(plan.get('changed', []))} "
+        f"changed, {plan.get('unchanged', 0)} unchanged file(s)."
+    )
+    if dry_run:
+        for key in to_upload:
+            typer.echo(f"Would upload {key}")
+        return
+
+    failed = unchanged = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                upload_file, authentication_header, bucket_name,
+                local_files[key]["path"], key, False
+            ): key
+            for key in to_upload
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                result = future.result()
+                if result.get("status") == "unchanged":
+                    unchanged += 1
+                    typer.echo(
+                        f"[{done}/{len(to_upload)}] Unchanged {key} "
+                        "(same content, skipped)"
+                    )
+                    continue
+                typer.echo(
+                    f"[{done}/{len(to_upload)}] Uploaded {key} "
+                    f"({local_files[key]['size']} bytes)"
+                )
+            except Exception as e:
+                failed += 1
+                typer.echo(f"[{done}/{len(to_upload)}] Failed {key}: {e}")
+                if getattr(e, "abort_warning", None):
+                    typer.echo(f"Warning: {e.abort_warning}")
+
+    typer.echo(
+        f"Sync finished: {len(to_upload) - failed - unchanged} uploaded, "
+        f"{unchanged} unchanged, {failed} failed."
+    )
+    if failed:
+        raise typer.Exit(code=1)
+
+@s3_cmd.command("ls")
+def s3_ls_cmd(
+    bucket_name: str = typer.Argument(..., help="Name of the bucket"),
+    prefix: str = typer.Argument("", help="Only list keys under this prefix"),
+    recursive: bool = typer.Option(
+        False, "--recursive", "-r",
+        help="List all keys under the prefix, instead of one level"
+    ),
+    limit: Optional[int] = typer.Option(
+        None, "--limit", "-l", min=1, help="Maximum number of rows to list"
+    )
+):
+    """List the objects in a bucket, printing rows as they arrive."""
+    authentication_header = generate_authentication_header()
+    for s3_object in stream_s3_objects_request(
+        authentication_header, bucket_name, prefix,
+        None if recursive else "/", limit
+    ):
+        if "prefix" in s3_object:
+            typer.echo(f"{'PRE':>31} {s3_object['prefix']}")
+        else:
+            last_modified = s3_object["last_modified"][:19].replace("T", " ")
+            typer.echo(
+                f"{last_modified} {s3_object['size']:>11} {s3_object['key']}"
+            )
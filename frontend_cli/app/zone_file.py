@@ -0,0 +1,187 @@
+"""
+Parse BIND zone files (RFC 1035 master files) into record sets: every
+value of a name and type, the way Route53 stores them.
+"""
+
+TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+RECORD_CLASSES = {"IN", "CH", "HS", "CS"}
+# Positions of the domain names in the data of each record type, which
+# can be relative to the origin
+DOMAIN_NAME_FIELDS = {
+    "CNAME": [0],
+    "DNAME": [0],
+    "NS": [0],
+    "PTR": [0],
+    "MX": [1],
+    "SRV": [3]
+}
+
+
+class ZoneFileError(Exception):
+    pass
+
+
+def parse_ttl(text: str) -> int:
+    """Parse a TTL in seconds ("3600") or with BIND units ("1h30m")"""
+    if text.isdigit():
+        return int(text)
+    ttl = 0
+    number = ""
+    for char in text.lower():
+        if char.isdigit():
+            number += char
+        elif char in TTL_UNITS and number:
+            ttl += int(number) * TTL_UNITS[char]
+            number = ""
+        else:
+            raise ValueError(f"Invalid TTL: {text}")
+    if number or not text:
+        raise ValueError(f"Invalid TTL: {text}")
+    return ttl
+
+
+def absolute_name(name: str) -> str:
+    name = name.lower()
+    return name if name.endswith(".") else f"{name}."
+
+
+def qualify_name(name: str, origin: str) -> str:
+    """Return the fully qualified name, with a trailing dot"""
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name.lower()
+    return f"{name}.{origin}".lower()
+
+
+def _read_entries(text: str):
+    """
+    Yield the entries of the file as (line number, inherits owner, tokens),
+    without comments, joining the lines of parenthesized entries. Quoted
+    strings are kept as a single token, with their quotes.
+    """
+    tokens = []
+    depth = 0
+    start_line = 0
+    inherits_owner = False
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if depth == 0:
+            start_line = line_number
+            inherits_owner = line[:1] in (" ", "\t")
+            tokens = []
+        i = 0
+        while i < len(line):
+            char = line[i]
+            if char == ";":
+                break
+            if char.isspace():
+                i += 1
+            elif char == "(":
+                depth += 1
+                i += 1
+            elif char == ")":
+                depth -= 1
+                if depth < 0:
+                    raise ZoneFileError(f"Line {line_number}: unbalanced ')'")
+                i += 1
+            elif char == '"':
+                end = i + 1
+                while end < len(line) and line[end] != '"':
+                    end += 2 if line[end] == "\\" else 1
+                if end >= len(line):
+                    raise ZoneFileError(
+                        f"Line {line_number}: unterminated quoted string"
+                    )
+                tokens.append(line[i:end + 1])
+                i = end + 1
+            else:
+                end = i
+                while end < len(line) and not line[end].isspace() \
+                        and line[end] not in '();"':
+                    end += 2 if line[end] == "\\" else 1
+                tokens.append(line[i:end])
+                i = end
+        if depth == 0 and tokens:
+            yield start_line, inherits_owner, tokens
+    if depth:
+        raise ZoneFileError(f"Line {start_line}: unbalanced '('")
+
+
+def parse_zone_file(text: str, origin: str) -> list[dict]:
+    """
+    Parse a zone file into record sets ({"name", "type", "ttl", "values"}),
+    in the order they first appear, with fully qualified names.
+    Supports $ORIGIN, $TTL, "@", relative names, blank owners (the previous
+    owner), optional TTLs and classes, parentheses and comments.
+    A record set takes the TTL of its first record.
+    """
+    origin = absolute_name(origin)
+    default_ttl = None
+    last_ttl = None
+    owner = None
+    record_sets = {}
+
+    for line_number, inherits_owner, tokens in _read_entries(text):
+        try:
+            if tokens[0].startswith("$"):
+                directive = tokens[0].upper()
+                if directive == "$ORIGIN":
+                    origin = qualify_name(tokens[1], origin)
+                elif directive == "$TTL":
+                    default_ttl = parse_ttl(tokens[1])
+                else:
+                    raise ValueError(f"{directive} is not supported")
+                continue
+
+            if not inherits_owner:
+                owner = qualify_name(tokens.pop(0), origin)
+            elif owner is None:
+                raise ValueError("the first record has no owner name")
+
+            ttl = None
+            while True:
+                token = tokens.pop(0)
+                if token.upper() in RECORD_CLASSES:
+                    continue
+                if token[0].isdigit():
+                    ttl = parse_ttl(token)
+                    continue
+                record_type = token.upper()
+                break
+            if not tokens:
+                raise ValueError(f"{record_type} record without data")
+        except IndexError:
+            raise ZoneFileError(f"Line {line_number}: incomplete entry")
+        except ValueError as e:
+            raise ZoneFileError(f"Line {line_number}: {e}")
+
+        # Without a TTL, a record takes the $TTL, or else the last TTL
+        # that was given explicitly (RFC 1035)
+        if ttl is None:
+            ttl = default_ttl if default_ttl is not None else last_ttl
+        else:
+            last_ttl = ttl
+        for field in DOMAIN_NAME_FIELDS.get(record_type, []):
+            if field < len(tokens):
+                tokens[field] = qualify_name(tokens[field], origin)
+        value = " ".join(tokens)
+
+        record_set = record_sets.setdefault((owner, record_type), {
+            "name": owner,
+            "type": record_type,
+            "ttl": ttl,
+            "values": []
+        })
+        if value not in record_set["values"]:
+            record_set["values"].append(value)
+
+    return list(record_sets.values())
+
+
+def is_zone_apex_record(record: dict, zone_name: str) -> bool:
+    """
+    Whether the record is the SOA or NS of the zone apex, which Route53
+    manages itself
+    """
+    return record["type"] in ("SOA", "NS") and \
+        record["name"] == absolute_name(zone_name)